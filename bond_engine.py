@@ -0,0 +1,54 @@
+# bond_engine.py
+import numpy as np
+from scipy.spatial import cKDTree
+
+from frame import wrap_into_box
+
+# Raios covalentes (Å). 'Xx' é o valor usado para elementos fora da tabela.
+COVALENT_RADII = {'C': 0.76, 'H': 0.31, 'O': 0.66, 'N': 0.71, 'S': 1.05, 'Xx': 0.7}
+BOND_TOLERANCE = 1.2 # Ligação se d <= (r_i + r_j) * tolerância
+
+
+def cutoff_matrix(element_names, tolerance=BOND_TOLERANCE):
+    """Distância máxima de ligação para cada par de elementos, formato (E, E)."""
+    radii = np.array([COVALENT_RADII.get(name, COVALENT_RADII['Xx']) for name in element_names])
+    return (radii[:, None] + radii[None, :]) * tolerance
+
+
+def element_codes(symbols):
+    """(nomes dos elementos, código por átomo) a partir de uma lista de símbolos."""
+    names, codes = np.unique(np.asarray(symbols), return_inverse=True)
+    return [str(name) for name in names], codes.ravel()
+
+
+def find_bonds(coords, codes, element_names, box_bounds=None, tolerance=BOND_TOLERANCE):
+    """Ligações por raios covalentes, como array (n_ligações, 2) com i < j.
+
+    Uma única busca de pares no cKDTree com o maior corte da tabela; depois, as
+    distâncias e o corte de cada par de elementos são avaliados de forma vetorizada.
+    Com `box_bounds` ((3, 2) ou apenas as arestas (3,)), usa imagens periódicas.
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    codes = np.asarray(codes, dtype=np.intp)
+    if len(coords) < 2: return np.zeros((0, 2), dtype=np.intp)
+    cutoffs = cutoff_matrix(element_names, tolerance)
+    rmax = float(cutoffs[np.ix_(np.unique(codes), np.unique(codes))].max())
+
+    if box_bounds is None:
+        pairs = cKDTree(coords).query_pairs(rmax, output_type='ndarray')
+        delta = coords[pairs[:, 1]] - coords[pairs[:, 0]]
+    else:
+        box_bounds = np.asarray(box_bounds, dtype=np.float64)
+        if box_bounds.ndim == 1: box_bounds = np.column_stack((np.zeros(3), box_bounds))
+        wrapped, box = wrap_into_box(coords, box_bounds)
+        pairs = cKDTree(wrapped, boxsize=box).query_pairs(rmax, output_type='ndarray')
+        delta = wrapped[pairs[:, 1]] - wrapped[pairs[:, 0]]
+        delta -= box * np.round(delta / box) # Imagem mínima
+    distances = np.sqrt(np.einsum('ij,ij->i', delta, delta))
+    return pairs[distances <= cutoffs[codes[pairs[:, 0]], codes[pairs[:, 1]]]]
+
+
+def frame_bonds(frame, tolerance=BOND_TOLERANCE, periodic=True):
+    """Ligações de um Frame de trajetória (índices de átomo no frame)."""
+    return find_bonds(frame.coords, frame.elements, frame.element_names,
+                      frame.box_bounds if periodic else None, tolerance)
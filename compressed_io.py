@@ -0,0 +1,133 @@
+# compressed_io.py
+import io
+import zlib
+import bisect
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+READ_CHUNK = 256 * 1024
+CHECKPOINT_INTERVAL = 32 * 1024 * 1024
+
+
+def detect_compression(filepath):
+    """Retorna 'gzip', 'zstd' ou None, pelos bytes mágicos do arquivo."""
+    with open(filepath, 'rb') as f: magic = f.read(4)
+    if magic.startswith(GZIP_MAGIC): return 'gzip'
+    if magic.startswith(ZSTD_MAGIC): return 'zstd'
+    return None
+
+
+def open_binary(filepath, checkpoints=None):
+    """Abre `filepath` para leitura binária, descomprimindo gzip/zstd de forma transparente.
+
+    `checkpoints` é uma lista compartilhada de pontos de retomada da descompressão
+    (ver CompressedReader); reutilizá-la entre aberturas evita re-descomprimir o
+    arquivo desde o início a cada salto.
+    """
+    codec = detect_compression(filepath)
+    if codec is None:
+        return open(filepath, 'rb')
+    if codec == 'zstd' and not ZSTD_AVAILABLE:
+        raise ImportError("O pacote 'zstandard' é necessário para ler arquivos .zst (pip install zstandard).")
+    return io.BufferedReader(CompressedReader(filepath, codec, checkpoints), buffer_size=READ_CHUNK)
+
+
+class CompressedReader(io.RawIOBase):
+    """Fluxo descomprimido de um arquivo gzip/zstd com suporte a seek por checkpoints.
+
+    Durante a leitura sequencial são registrados checkpoints (offset descomprimido,
+    offset comprimido, estado do descompressor). Um seek retoma a partir do checkpoint
+    mais próximo anterior ao destino em vez de descomprimir o arquivo desde o início.
+    Checkpoints em fronteiras de membro gzip / frame zstd não dependem de estado
+    (estado None) e podem ser persistidos; os intermediários (só gzip, via
+    zlib.decompressobj.copy) valem apenas durante a sessão.
+    """
+
+    def __init__(self, filepath, codec, checkpoints=None):
+        super().__init__()
+        self._raw = open(filepath, 'rb')
+        self._codec = codec
+        self.checkpoints = checkpoints if checkpoints is not None else []
+        if not self.checkpoints: self.checkpoints.append((0, 0, None))
+        self._restore(self.checkpoints[0])
+
+    # --- Interface RawIOBase ---
+    def readable(self): return True
+    def seekable(self): return True
+    def tell(self): return self._upos
+
+    def close(self):
+        if not self.closed: self._raw.close()
+        super().close()
+
+    def readinto(self, buffer):
+        while self._pending_pos >= len(self._pending):
+            if not self._fill(): return 0
+        n = min(len(buffer), len(self._pending) - self._pending_pos)
+        buffer[:n] = self._pending[self._pending_pos:self._pending_pos + n]
+        self._pending_pos += n; self._upos += n
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR: offset += self._upos
+        elif whence != io.SEEK_SET: raise io.UnsupportedOperation("Seek relativo ao fim não é suportado em arquivos comprimidos.")
+        if offset < self._upos or offset - self._upos > CHECKPOINT_INTERVAL:
+            keys = [cp[0] for cp in self.checkpoints]
+            checkpoint = self.checkpoints[bisect.bisect_right(keys, offset) - 1]
+            if checkpoint[0] > self._upos or offset < self._upos: self._restore(checkpoint)
+        self._skip(offset - self._upos)
+        return self._upos
+
+    # --- Descompressão ---
+    def _new_decompressor(self):
+        if self._codec == 'gzip': return zlib.decompressobj(wbits=31)
+        return zstandard.ZstdDecompressor().decompressobj()
+
+    def _restore(self, checkpoint):
+        upos, cpos, state = checkpoint
+        self._raw.seek(cpos)
+        self._decompressor = state.copy() if state is not None else self._new_decompressor()
+        self._cpos = cpos; self._upos = upos; self._out_total = upos
+        self._pending = b""; self._pending_pos = 0; self._eof = False
+
+    def _skip(self, count):
+        while count > 0:
+            available = len(self._pending) - self._pending_pos
+            if available == 0:
+                if not self._fill(): return
+                continue
+            step = min(count, available)
+            self._pending_pos += step; self._upos += step; count -= step
+
+    def _fill(self):
+        """Descomprime o próximo bloco de entrada para `_pending`. Retorna False no fim do arquivo."""
+        if self._eof: return False
+        chunk = self._raw.read(READ_CHUNK)
+        if not chunk:
+            self._eof = True; return False
+        chunk_start = self._cpos; self._cpos += len(chunk)
+        magic = GZIP_MAGIC if self._codec == 'gzip' else ZSTD_MAGIC
+        outputs = []; data = chunk
+        while data:
+            outputs.append(self._decompressor.decompress(data))
+            self._out_total += len(outputs[-1])
+            if not self._decompressor.eof: break
+            # Fim de um membro gzip / frame zstd: o restante começa um novo, com descompressor novo
+            data = self._decompressor.unused_data
+            self._decompressor = self._new_decompressor()
+            if data and not (data.startswith(magic) or magic.startswith(data)):
+                self._eof = True; break # Dados finais não reconhecidos (ex.: preenchimento com zeros)
+            self._add_checkpoint((self._out_total, chunk_start + len(chunk) - len(data), None))
+        self._pending = b"".join(outputs); self._pending_pos = 0
+        if self._codec == 'gzip' and self._out_total - self.checkpoints[-1][0] >= CHECKPOINT_INTERVAL:
+            self._add_checkpoint((self._out_total, self._cpos, self._decompressor.copy()))
+        return True
+
+    def _add_checkpoint(self, checkpoint):
+        if checkpoint[0] > self.checkpoints[-1][0]: self.checkpoints.append(checkpoint)
@@ -0,0 +1,90 @@
+# correlator.py
+import numpy as np
+
+
+class MultiTauCorrelator:
+    """Correlador multi-tau em streaming, alimentado um frame por vez.
+
+    Mantém `num_levels` níveis com `points_per_level` valores cada; o nível k guarda
+    amostras espaçadas de `averaging`**k frames, de modo que os lags crescem de forma
+    logarítmica e a memória é fixa, independente do tamanho da trajetória.
+
+    Modos:
+      'product'      -> C(τ) = <a(t) · a(t+τ)>        (VACF, autocorrelação de carga)
+      'displacement' -> MSD(τ) = <|x(t+τ) - x(t)|²>  (posições desdobradas)
+
+    No modo 'product' os níveis superiores recebem médias de `averaging` amostras
+    (esquema clássico de Ramírez et al., 2010). No modo 'displacement' recebem as
+    próprias posições (decimação), pois a média de posições distorce o MSD.
+    Os valores de cada frame têm formato (átomos,) ou (átomos, componentes); o
+    resultado é somado sobre as componentes e dividido pelo número de átomos.
+    """
+
+    def __init__(self, points_per_level=16, averaging=2, num_levels=20, mode='product'):
+        if mode not in ('product', 'displacement'):
+            raise ValueError(f"Modo de correlação desconhecido: {mode}")
+        if points_per_level % averaging != 0:
+            raise ValueError("points_per_level deve ser múltiplo de averaging.")
+        self.points_per_level, self.averaging, self.num_levels, self.mode = points_per_level, averaging, num_levels, mode
+        self.num_atoms = None
+        self.num_frames = 0
+
+    def _allocate(self, num_atoms, num_values):
+        p, levels = self.points_per_level, self.num_levels
+        self.num_atoms = num_atoms
+        self._buffers = np.zeros((levels, p, num_values))  # Buffers circulares por nível
+        self._heads = np.full(levels, -1)                  # Posição da amostra mais recente
+        self._inserted = np.zeros(levels, dtype=np.int64)
+        self._sums = np.zeros((levels, p))
+        self._counts = np.zeros((levels, p), dtype=np.int64)
+        self._block_sums = np.zeros((levels, num_values))  # Médias em formação para o nível seguinte
+        self._block_counts = np.zeros(levels, dtype=np.int64)
+
+    def add(self, values):
+        """Acrescenta os valores do próximo frame."""
+        values = np.asarray(values, dtype=np.float64)
+        if self.num_atoms is None: self._allocate(values.shape[0], values.size)
+        elif values.shape[0] != self.num_atoms:
+            raise ValueError("O número de átomos mudou durante a correlação.")
+        self.num_frames += 1
+        sample = values.ravel()
+        for level in range(self.num_levels):
+            self._insert(level, sample)
+            if self.mode == 'product':
+                self._block_sums[level] += sample
+                self._block_counts[level] += 1
+                if self._block_counts[level] < self.averaging: return
+                sample = self._block_sums[level] / self.averaging
+                self._block_sums[level] = 0.0; self._block_counts[level] = 0
+            elif self._inserted[level] % self.averaging != 0:
+                return
+
+    def _insert(self, level, sample):
+        p = self.points_per_level
+        head = (self._heads[level] + 1) % p
+        self._heads[level] = head
+        self._buffers[level, head] = sample
+        self._inserted[level] += 1
+        # Lags 0..p-1 no nível 0; nos demais, só os que o nível anterior não cobre
+        first_lag = 0 if level == 0 else p // self.averaging
+        lags = np.arange(first_lag, min(self._inserted[level], p))
+        if lags.size == 0: return
+        older = self._buffers[level, (head - lags) % p]
+        if self.mode == 'product':
+            self._sums[level, lags] += older @ sample
+        else:
+            self._sums[level, lags] += np.einsum('ij,ij->i', older - sample, older - sample)
+        self._counts[level, lags] += 1
+
+    def result(self):
+        """(lags em frames, valores da correlação), só para os lags que já têm amostras."""
+        if self.num_atoms is None: return np.zeros(0), np.zeros(0)
+        p, m = self.points_per_level, self.averaging
+        lags, values = [], []
+        for level in range(self.num_levels):
+            first_lag = 0 if level == 0 else p // m
+            j = np.arange(first_lag, p)
+            filled = self._counts[level, j] > 0
+            lags.append(j[filled] * m**level)
+            values.append(self._sums[level, j[filled]] / self._counts[level, j[filled]] / self.num_atoms)
+        return np.concatenate(lags).astype(np.float64), np.concatenate(values)
@@ -0,0 +1,312 @@
+# dump_reader.py
+import os
+import time
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from compressed_io import open_binary, detect_compression
+from frame import Frame
+
+INDEX_SUFFIX = ".idx.npz"
+FRAME_MARKER = b"ITEM: TIMESTEP"
+PARALLEL_CHUNK_BYTES = 64 * 1024 * 1024
+
+
+def _parse_byte_range(filepath, start, end):
+    """Tarefa de um processo trabalhador: lê os frames que começam em [start, end)."""
+    reader = DumpReader(filepath)
+    frames = []
+    with open_binary(filepath) as f:
+        f.seek(start)
+        while f.tell() < end:
+            frame = reader._read_frame(f)
+            if frame is None: break
+            frames.append(frame)
+    return frames, reader.element_names
+
+
+class DumpReader:
+    """Leitor em streaming de arquivos dump.lammpstrj.
+
+    Entrega um Frame por vez, com arrays NumPy contíguos (ids inteiros, códigos de
+    elemento em uint8, coordenadas em float32 e, se presentes, flags de imagem ix/iy/iz,
+    cargas q e velocidades vx/vy/vz),
+    de modo que o uso de memória não depende do tamanho do arquivo. Os códigos de elemento apontam para
+    `element_names`, tabela compartilhada por todos os frames do leitor.
+
+    O acesso aleatório usa um índice de frames (timestep, offset em bytes, número
+    de átomos e caixa) construído uma única vez e salvo ao lado do arquivo.
+    Arquivos .gz/.zst são lidos diretamente; nesse caso os offsets se referem ao
+    fluxo descomprimido e os saltos usam os checkpoints de descompressão.
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.element_names = []
+        self._element_codes = {}
+        self._index = None
+        self.compression = detect_compression(filepath)
+        self._checkpoints = [] # Compartilhados entre aberturas do arquivo comprimido
+
+    def __iter__(self):
+        return self.iter_frames()
+
+    def __len__(self):
+        return len(self.index['timesteps'])
+
+    def iter_frames(self, indices=None):
+        """Itera sobre os frames. Com `indices`, salta direto para cada frame pelo índice."""
+        with self._open() as f:
+            if indices is None:
+                while True:
+                    frame = self._read_frame(f)
+                    if frame is None: return
+                    yield frame
+            else:
+                offsets = self.index['offsets']
+                for k in indices:
+                    f.seek(int(offsets[k]))
+                    frame = self._read_frame(f)
+                    if frame is None: return
+                    yield frame
+
+    def read_frame(self, k):
+        return next(self.iter_frames([k]))
+
+    def _open(self):
+        return open_binary(self.filepath, self._checkpoints)
+
+    # --- Leitura paralela ---
+    def iter_frames_parallel(self, workers=None, max_frames=None):
+        """Itera sobre todos os frames, em ordem, lendo faixas de bytes em um pool de processos.
+
+        As faixas são alinhadas a linhas `ITEM: TIMESTEP`, de modo que cada processo lê
+        frames completos. Com `max_frames`, a leitura para no fim desse frame do índice
+        (frames anexados depois da indexação não são lidos). Ao final, `last_parse_stats`
+        traz a vazão (frames/s e MB/s).
+        """
+        workers = workers or os.cpu_count() or 1
+        file_size = os.path.getsize(self.filepath)
+        if self.compression:
+            # Fluxos comprimidos não podem ser divididos por faixas de bytes: leitura sequencial
+            start_time = time.perf_counter(); num_frames = 0
+            for frame in itertools.islice(self.iter_frames(), max_frames):
+                num_frames += 1
+                yield frame
+            elapsed = max(time.perf_counter() - start_time, 1e-9)
+            self.last_parse_stats = {'frames': num_frames, 'seconds': elapsed, 'frames_per_s': num_frames / elapsed,
+                                     'mb_per_s': file_size / 1e6 / elapsed}
+            return
+        if max_frames is not None: file_size = self._indexed_end(max_frames)
+        num_chunks = max(workers, -(-file_size // PARALLEL_CHUNK_BYTES))
+        bounds = self._chunk_boundaries(num_chunks, file_size)
+        ranges = list(zip(bounds[:-1], bounds[1:]))
+
+        start_time = time.perf_counter(); num_frames = 0
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Janela limitada de tarefas pendentes: mantém a memória controlada e a ordem dos frames
+            pending = deque()
+            ranges_iter = iter(ranges)
+            for start, end in itertools.islice(ranges_iter, 2 * workers):
+                pending.append(executor.submit(_parse_byte_range, self.filepath, start, end))
+            while pending:
+                frames, element_names = pending.popleft().result()
+                next_range = next(ranges_iter, None)
+                if next_range: pending.append(executor.submit(_parse_byte_range, self.filepath, *next_range))
+                # Cada processo numera os elementos na ordem em que os encontra: traduz para a tabela deste leitor
+                lookup = np.array([self.element_code(name) for name in element_names], dtype=np.uint8)
+                for frame in frames:
+                    frame.set_elements(lookup[frame.elements], self.element_names)
+                    num_frames += 1
+                    yield frame
+
+        elapsed = max(time.perf_counter() - start_time, 1e-9)
+        self.last_parse_stats = {'frames': num_frames, 'seconds': elapsed, 'frames_per_s': num_frames / elapsed,
+                                 'mb_per_s': file_size / 1e6 / elapsed}
+
+    def read_parallel(self, workers=None):
+        """Lê todos os frames em paralelo. Retorna (frames, estatísticas de vazão)."""
+        frames = list(self.iter_frames_parallel(workers))
+        return frames, self.last_parse_stats
+
+    def _indexed_end(self, max_frames):
+        """Offset em que termina o frame `max_frames - 1` do índice (início do seguinte ou fim do arquivo)."""
+        offsets = self.index['offsets']
+        if max_frames < len(offsets): return int(offsets[max_frames])
+        file_size = os.path.getsize(self.filepath)
+        if len(offsets) == 0: return file_size
+        with open(self.filepath, 'rb') as f:
+            offset = self._next_frame_offset(f, int(offsets[-1]) + 1)
+        return file_size if offset is None else offset
+
+    def _chunk_boundaries(self, num_chunks, file_size):
+        """Offsets de início de frame que dividem os primeiros `file_size` bytes em ~`num_chunks` faixas."""
+        if self._index is not None:
+            offsets = self._index['offsets']
+            offsets = offsets[offsets < file_size]
+            picks = np.unique(np.linspace(0, len(offsets), num_chunks, endpoint=False).astype(np.int64))
+            return [int(offsets[k]) for k in picks if k < len(offsets)] + [file_size]
+        bounds = [0]
+        with open(self.filepath, 'rb') as f:
+            for k in range(1, num_chunks):
+                offset = self._next_frame_offset(f, file_size * k // num_chunks)
+                if offset is None: break
+                if offset > bounds[-1]: bounds.append(offset)
+        return bounds + [file_size]
+
+    @staticmethod
+    def _next_frame_offset(f, position, block_size=1 << 20):
+        """Primeiro offset >= `position` em que começa uma linha `ITEM: TIMESTEP`."""
+        pattern = b"\n" + FRAME_MARKER
+        keep = len(pattern) - 1
+        data_start = max(position - 1, 0)
+        f.seek(data_start)
+        data = f.read(block_size)
+        while data:
+            found = data.find(pattern)
+            if found >= 0: return data_start + found + 1
+            more = f.read(block_size)
+            if not more: return None
+            # Mantém a sobreposição para não perder o marcador dividido entre dois blocos
+            tail = data[-keep:]
+            data_start += len(data) - len(tail)
+            data = tail + more
+        return None
+
+    def element_code(self, element):
+        """Código inteiro do elemento (registra o elemento se for novo)."""
+        code = self._element_codes.get(element)
+        if code is None:
+            code = len(self.element_names)
+            if code > np.iinfo(np.uint8).max:
+                raise ValueError("Número de elementos distintos excede o limite suportado (256).")
+            self._element_codes[element] = code
+            self.element_names.append(element)
+        return code
+
+    # --- Índice de frames ---
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = self._load_index()
+            if self._index is None:
+                self._index = self.build_index()
+                self._save_index()
+        return self._index
+
+    @property
+    def index_path(self):
+        return self.filepath + INDEX_SUFFIX
+
+    def build_index(self):
+        """Percorre o arquivo lendo apenas os cabeçalhos e pulando os blocos de átomos."""
+        timesteps, offsets, natoms, boxes = [], [], [], []
+        with self._open() as f:
+            frame_offset = 0; timestep = None; num_atoms = 0; box_bounds = np.zeros((3, 2))
+            while True:
+                line = f.readline()
+                if not line: break
+                item = line.strip()
+                if item == b"ITEM: TIMESTEP":
+                    frame_offset = f.tell() - len(line)
+                    timestep = int(f.readline())
+                elif item == b"ITEM: NUMBER OF ATOMS":
+                    num_atoms = int(f.readline())
+                elif item.startswith(b"ITEM: BOX BOUNDS"):
+                    box_bounds = np.array([[float(v) for v in f.readline().split()[:2]] for _ in range(3)])
+                elif item.startswith(b"ITEM: ATOMS"):
+                    if self._skip_lines(f, num_atoms) < num_atoms: break # Frame truncado no fim do arquivo
+                    timesteps.append(timestep); offsets.append(frame_offset); natoms.append(num_atoms); boxes.append(box_bounds)
+        return {'timesteps': np.array(timesteps, dtype=np.int64), 'offsets': np.array(offsets, dtype=np.int64),
+                'natoms': np.array(natoms, dtype=np.int64), 'box_bounds': np.array(boxes, dtype=np.float64).reshape(-1, 3, 2)}
+
+    @staticmethod
+    def _skip_lines(f, n):
+        """Avança `n` linhas sem decodificá-las e retorna quantas foram de fato puladas."""
+        last = deque(enumerate(itertools.islice(f, n), 1), maxlen=1)
+        return last[0][0] if last else 0
+
+    def _source_signature(self):
+        stat = os.stat(self.filepath)
+        return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+    def _load_index(self):
+        try:
+            with np.load(self.index_path) as data:
+                if not np.array_equal(data['source'], self._source_signature()): return None
+                if self.compression and not self._checkpoints:
+                    self._checkpoints.extend((int(u), int(c), None) for u, c in data['checkpoints'])
+                return {key: data[key] for key in ('timesteps', 'offsets', 'natoms', 'box_bounds')}
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def _save_index(self):
+        # Só os checkpoints sem estado (início de membro gzip / frame zstd) podem ir para o disco
+        checkpoints = np.array([(u, c) for u, c, state in self._checkpoints if state is None], dtype=np.int64).reshape(-1, 2)
+        try:
+            with open(self.index_path, 'wb') as f:
+                np.savez(f, source=self._source_signature(), checkpoints=checkpoints, **self._index)
+        except OSError:
+            pass # Diretório somente leitura: o índice fica apenas em memória
+
+    # --- Leitura de frames ---
+    def _read_frame(self, f):
+        """Lê o próximo frame a partir da posição atual de `f`. Retorna None no fim do arquivo."""
+        timestep = None; num_atoms = 0; box_bounds = None
+        while True:
+            line = f.readline()
+            if not line: return None
+            item = line.strip()
+            if item == b"ITEM: TIMESTEP":
+                timestep = int(f.readline())
+            elif item == b"ITEM: NUMBER OF ATOMS":
+                num_atoms = int(f.readline())
+            elif item.startswith(b"ITEM: BOX BOUNDS"):
+                box_bounds = np.array([[float(v) for v in f.readline().split()[:2]] for _ in range(3)])
+            elif item.startswith(b"ITEM: ATOMS"):
+                headers = item.decode().split()[2:]
+                # Lê o bloco de átomos de uma vez e converte em bloco, sem laço por linha
+                block = b"".join(itertools.islice(f, num_atoms))
+                return self._parse_atoms_block(block, headers, num_atoms, timestep, box_bounds)
+
+    def _parse_atoms_block(self, block, headers, num_atoms, timestep, box_bounds):
+        tokens = block.split()
+        num_cols = len(headers)
+        if len(tokens) != num_atoms * num_cols:
+            return None # Frame truncado (ex.: simulação ainda em andamento)
+
+        def column(name, convert, dtype):
+            # Cada coluna é uma fatia da lista de tokens convertida direto para o array de destino
+            return np.fromiter(map(convert, tokens[headers.index(name)::num_cols]), dtype=dtype, count=num_atoms)
+
+        el_col = 'element' if 'element' in headers else 'type'
+        coord_cols = ['x', 'y', 'z'] if 'x' in headers else ['xu', 'yu', 'zu']
+        ids = column('id', int, np.int32)
+        coords = np.empty((num_atoms, 3), dtype=np.float32)
+        for axis, name in enumerate(coord_cols): coords[:, axis] = column(name, float, np.float64)
+        images = None
+        if all(name in headers for name in ('ix', 'iy', 'iz')):
+            images = np.empty((num_atoms, 3), dtype=np.int32)
+            for axis, name in enumerate(('ix', 'iy', 'iz')): images[:, axis] = column(name, int, np.int32)
+        charges = column('q', float, np.float64) if 'q' in headers else None
+        velocities = None
+        if all(name in headers for name in ('vx', 'vy', 'vz')):
+            velocities = np.empty((num_atoms, 3))
+            for axis, name in enumerate(('vx', 'vy', 'vz')): velocities[:, axis] = column(name, float, np.float64)
+
+        names, inverse = np.unique(np.array(tokens[headers.index(el_col)::num_cols]), return_inverse=True)
+        lookup = np.array([self.element_code(name.decode()) for name in names], dtype=np.uint8)
+        elements = lookup[inverse.ravel()]
+
+        if num_atoms > 1 and not np.all(ids[1:] > ids[:-1]):
+            order = np.argsort(ids, kind='stable')
+            ids, elements, coords = ids[order], elements[order], coords[order]
+            if images is not None: images = images[order]
+            if charges is not None: charges = charges[order]
+            if velocities is not None: velocities = velocities[order]
+
+        # 'unwrapped': coordenadas xu/yu/zu já vêm desdobradas pelo LAMMPS
+        return Frame(timestep, ids, elements, coords, box_bounds, self.element_names, images=images,
+                     charges=charges, velocities=velocities, unwrapped=coord_cols[0] == 'xu')
@@ -0,0 +1,72 @@
+# frame.py
+import numpy as np
+
+
+def wrap_into_box(coords, box_bounds):
+    """Leva as coordenadas para [0, L) em cada eixo, como exige o cKDTree periódico."""
+    box = box_bounds[:, 1] - box_bounds[:, 0]
+    wrapped = np.mod(coords - box_bounds[:, 0], box)
+    wrapped[wrapped >= box] = 0.0 # Arredondamento de np.mod pode devolver exatamente L
+    return wrapped, box
+
+
+class Frame:
+    """Um frame de trajetória em forma de estrutura de arrays.
+
+    ids (int32, ordenados), códigos de elemento (uint8) e coordenadas (float32) ficam
+    em arrays contíguos; os códigos apontam para `element_names`, a tabela compartilhada
+    por todos os frames do mesmo leitor. Colunas opcionais do dump (images, charges,
+    velocities) são None quando ausentes. O índice por elemento é calculado uma única
+    vez, na primeira consulta, e reutilizado por todas as análises.
+    """
+
+    __slots__ = ('timestep', 'ids', 'elements', 'coords', 'box_bounds', 'images', 'charges', 'velocities',
+                 'unwrapped', 'element_names', '_element_order', '_element_starts')
+
+    def __init__(self, timestep, ids, elements, coords, box_bounds, element_names,
+                 images=None, charges=None, velocities=None, unwrapped=False):
+        self.timestep = timestep
+        self.ids = ids
+        self.elements = elements
+        self.coords = coords
+        self.box_bounds = box_bounds
+        self.element_names = element_names
+        self.images = images
+        self.charges = charges
+        self.velocities = velocities
+        self.unwrapped = unwrapped
+        self._element_order = None
+        self._element_starts = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def box(self):
+        return self.box_bounds[:, 1] - self.box_bounds[:, 0] if self.box_bounds is not None else None
+
+    @property
+    def volume(self):
+        return float(np.prod(self.box))
+
+    def element_code(self, element):
+        """Código do elemento na tabela do leitor, ou -1 se não existir."""
+        return self.element_names.index(element) if element in self.element_names else -1
+
+    def indices_of(self, code):
+        """Índices (crescentes) dos átomos com o código de elemento `code`."""
+        if self._element_order is None:
+            # Ordenação estável por código: os átomos de cada elemento ficam contíguos
+            self._element_order = np.argsort(self.elements, kind='stable')
+            counts = np.bincount(self.elements, minlength=len(self.element_names))
+            self._element_starts = np.concatenate(([0], np.cumsum(counts)))
+        if code < 0 or code + 1 >= len(self._element_starts):
+            return np.zeros(0, dtype=np.intp)
+        return self._element_order[self._element_starts[code]:self._element_starts[code + 1]]
+
+    def set_elements(self, elements, element_names):
+        """Troca a tabela de elementos (ex.: frames vindos de outro processo) e invalida o índice."""
+        self.elements = elements
+        self.element_names = element_names
+        self._element_order = None
+        self._element_starts = None
@@ -121,6 +121,8 @@ class MainApp(QMainWindow):
         self.setCentralWidget(self.main_container)
         self.welcome_tab = WelcomeTab(); self.builder_tab = SystemBuilderTab(); self.control_tab = InputGeneratorTab(); self.analysis_hub = AnalysisHubTab()
         self.tab_view.addTab(self.welcome_tab, "Início"); self.tab_view.addTab(self.builder_tab, "Construtor de Sistema"); self.tab_view.addTab(self.control_tab, "Controle da Simulação"); self.tab_view.addTab(self.analysis_hub, "Análises")
+        self.control_tab.simulation_started.connect(self.analysis_hub.on_simulation_started) # species.log acompanhado ao vivo
+        self.control_tab.thermo_updated.connect(self.analysis_hub.on_thermo_updated) # thermo do stdout do LAMMPS
     
     def toggle_theme(self):
         if self.current_theme == 'dark':
@@ -0,0 +1,83 @@
+# msd_engine.py
+import numpy as np
+from scipy.fft import rfft, irfft, next_fast_len
+
+MAX_CHUNK_VALUES = 2_000_000 # Valores (frames x coordenadas) por bloco de átomos na FFT
+
+
+def msd_fft(positions, atoms_per_chunk=None):
+    """MSD médio sobre todos os átomos e todas as origens de tempo, para os lags 0..T-1.
+
+    `positions` tem formato (T, N, 3) e deve estar desdobrada (sem saltos de caixa).
+    Usa o algoritmo de FFT: MSD(m) = S1(m) - 2*S2(m), em que S2 é a autocorrelação das
+    posições (via FFT com preenchimento de zeros) e S1 sai de somas acumuladas de x².
+    Custo O(T log T) por coordenada; os átomos são processados em blocos para limitar a
+    memória. Equivale a np.mean(np.sum((x[t:] - x[:-t])**2, axis=2)) para cada lag t.
+    """
+    num_frames, num_atoms = positions.shape[:2]
+    msd = np.zeros(num_frames)
+    if num_frames < 2 or num_atoms == 0: return msd
+    n_fft = next_fast_len(2 * num_frames)
+    chunk = atoms_per_chunk or max(1, MAX_CHUNK_VALUES // (3 * num_frames))
+    lags = np.arange(num_frames)
+
+    for start in range(0, num_atoms, chunk):
+        x = np.asarray(positions[:, start:start + chunk], dtype=np.float64).reshape(num_frames, -1)
+        # Remover a posição média não altera o MSD e reduz o cancelamento numérico em S1 - 2*S2
+        x = x - x.mean(axis=0)
+        spectrum = rfft(x, n=n_fft, axis=0)
+        s2 = irfft(spectrum * spectrum.conj(), n=n_fft, axis=0)[:num_frames].sum(axis=1)
+        # S1(m) = soma de x_k² para k em [0, T-m) mais soma de x_k² para k em [m, T)
+        cumulative = np.concatenate(([0.0], np.cumsum((x**2).sum(axis=1))))
+        s1 = cumulative[num_frames - lags] + (cumulative[num_frames] - cumulative[lags])
+        msd += s1 - 2.0 * s2
+
+    msd /= (num_frames - lags) * num_atoms
+    msd[0] = 0.0
+    return msd
+
+
+def unwrap_positions(positions, boxes, images=None):
+    """Desdobra posições (T, N, 3) de uma trajetória com condições periódicas.
+
+    `boxes` traz as arestas da caixa de cada frame, formato (T, 3), o que mantém o
+    resultado correto em NPT. Com flags de imagem (T, N, 3), x_desdobrado = x + imagem * L.
+    Sem elas, aplica a imagem mínima aos deslocamentos entre frames consecutivos e
+    reconstrói a trajetória com uma soma acumulada, sem laço em Python.
+    """
+    boxes = np.asarray(boxes, dtype=np.float64)[:, None, :]
+    if images is not None:
+        return positions + images * boxes
+    displacement = np.diff(positions, axis=0)
+    displacement -= boxes[1:] * np.round(displacement / boxes[1:])
+    unwrapped = np.empty_like(positions, dtype=np.float64)
+    unwrapped[0] = positions[0]
+    np.cumsum(displacement, axis=0, out=unwrapped[1:])
+    unwrapped[1:] += positions[0]
+    return unwrapped
+
+
+class PositionUnwrapper:
+    """Versão em streaming de unwrap_positions: recebe um frame por vez.
+
+    Guarda apenas as posições do frame anterior, para alimentar correladores sem
+    manter a trajetória inteira em memória.
+    """
+
+    def __init__(self):
+        self._previous = None
+        self._unwrapped = None
+
+    def update(self, coords, box, images=None):
+        """Posições desdobradas do frame atual (`box` são as arestas da caixa deste frame)."""
+        coords = np.asarray(coords, dtype=np.float64)
+        if images is not None:
+            return coords + images * np.asarray(box, dtype=np.float64)
+        if self._previous is None:
+            self._unwrapped = coords.copy()
+        else:
+            displacement = coords - self._previous
+            displacement -= box * np.round(displacement / box)
+            self._unwrapped += displacement
+        self._previous = coords.copy()
+        return self._unwrapped.copy()
@@ -0,0 +1,47 @@
+# parse_cache.py
+import os
+import hashlib
+import numpy as np
+
+CACHE_VERSION = 1
+APP_CACHE_NAME = "atomos"
+
+
+def cache_dir():
+    """Diretório do cache de logs já processados, por usuário (LOCALAPPDATA no Windows, XDG_CACHE_HOME/~/.cache nos demais)."""
+    base = os.environ.get('LOCALAPPDATA') if os.name == 'nt' else os.environ.get('XDG_CACHE_HOME')
+    return os.path.join(base or os.path.join(os.path.expanduser("~"), ".cache"), APP_CACHE_NAME, "parsed")
+
+
+def cache_path(filepath, kind):
+    """Arquivo de cache de `filepath` para o tipo de conteúdo `kind` (ex.: 'species', 'thermo')."""
+    key = hashlib.sha1(f"{kind}|{CACHE_VERSION}|{os.path.abspath(filepath)}".encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir(), f"{kind}-{key}.npz")
+
+
+def _source_signature(filepath):
+    stat = os.stat(filepath)
+    return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+
+def load(filepath, kind):
+    """Arrays guardados para `filepath`, ou None se não houver cache ou se o arquivo mudou (tamanho/mtime)."""
+    try:
+        with np.load(cache_path(filepath, kind), allow_pickle=False) as data:
+            if not np.array_equal(data['source'], _source_signature(filepath)): return None
+            return {key: data[key] for key in data.files if key != 'source'}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def store(filepath, kind, arrays):
+    """Guarda o resultado já processado (dicionário de arrays numpy) para as próximas aberturas."""
+    path = cache_path(filepath, kind)
+    temporary = path + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temporary, 'wb') as f:
+            np.savez(f, source=_source_signature(filepath), **arrays)
+        os.replace(temporary, path) # Troca atômica: um cache incompleto nunca é lido
+    except OSError:
+        pass # Sem permissão de escrita: segue sem cache
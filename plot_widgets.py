@@ -0,0 +1,113 @@
+# plot_widgets.py
+import pyqtgraph as pg
+import pyqtgraph.exporters
+from PyQt6.QtWidgets import QFileDialog, QMessageBox, QPushButton
+from PyQt6.QtCore import Qt, QRect
+from PyQt6.QtGui import QPainter
+from PyQt6.QtSvg import QSvgGenerator
+
+PLACEHOLDER_COLOR = '#A0A0A0'
+
+
+class FastPlot(pg.PlotWidget):
+    """PlotWidget do pyqtgraph para séries longas, com as curvas reaproveitadas entre atualizações.
+
+    Cada curva (e cada conjunto de linhas de referência) tem uma chave: na primeira
+    chamada o item é criado, nas seguintes só recebe os dados novos via setData, sem
+    limpar e redesenhar o gráfico. Downsampling por picos e clip-to-view ficam ligados,
+    então só os pontos visíveis, reduzidos à resolução da tela, são desenhados.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.plot_item = self.getPlotItem()
+        self.plot_item.setDownsampling(auto=True, mode='peak')
+        self.plot_item.setClipToView(True)
+        self.plot_item.showGrid(x=True, y=True, alpha=0.2)
+        self.legend = self.plot_item.addLegend(offset=(-10, 10))
+        self.curves = {}; self.lines = {}; self._names = {}
+        self.placeholder = pg.TextItem('', color=PLACEHOLDER_COLOR, anchor=(0.5, 0.5))
+        self.placeholder.setPos(0.5, 0.5); self.placeholder.setVisible(False)
+        self.plot_item.addItem(self.placeholder, ignoreBounds=True)
+
+    def set_labels(self, title, xlabel, ylabel):
+        self.plot_item.setTitle(title); self.plot_item.setLabel('bottom', xlabel); self.plot_item.setLabel('left', ylabel)
+
+    def set_curve(self, key, x, y, name=None, pen=None, symbol=None, symbol_size=5, symbol_brush=None):
+        """Cria ou atualiza (setData) a curva `key`; `name` aparece na legenda."""
+        curve = self.curves.get(key)
+        if curve is None:
+            curve = self.curves[key] = self.plot_item.plot()
+        curve.setPen(pen); curve.setSymbol(symbol); curve.setSymbolSize(symbol_size)
+        curve.setSymbolBrush(symbol_brush); curve.setSymbolPen(None)
+        if name != self._names.get(key):
+            if self._names.get(key): self.legend.removeItem(curve)
+            if name: self.legend.addItem(curve, name)
+            self._names[key] = name
+        curve.setData(x, y)
+        if self.placeholder.isVisible():
+            # Saindo do placeholder: o setRange fixo de show_placeholder desligou o auto-range
+            self.placeholder.setVisible(False); self.plot_item.enableAutoRange()
+        return curve
+
+    def remove_curves(self, keep=()):
+        """Remove as curvas cujas chaves não estão em `keep`."""
+        for key in [key for key in self.curves if key not in keep]:
+            curve = self.curves.pop(key)
+            if self._names.pop(key, None): self.legend.removeItem(curve)
+            self.plot_item.removeItem(curve)
+
+    def set_lines(self, key, positions, angle=90, pen=None):
+        """Linhas de referência (verticais com angle=90, horizontais com 0) nas posições dadas; as que sobram ficam ocultas."""
+        lines = self.lines.setdefault(key, [])
+        while len(lines) < len(positions):
+            line = pg.InfiniteLine(angle=angle, movable=False)
+            self.plot_item.addItem(line, ignoreBounds=True); lines.append(line)
+        for line, position in zip(lines, positions):
+            line.setPen(pen); line.setPos(position); line.setVisible(True)
+        for line in lines[len(positions):]: line.setVisible(False)
+
+    def show_placeholder(self, text):
+        """Remove as curvas, oculta as linhas e mostra uma mensagem no centro do gráfico."""
+        self.remove_curves()
+        for lines in self.lines.values():
+            for line in lines: line.setVisible(False)
+        self.placeholder.setText(text); self.placeholder.setVisible(True)
+        self.plot_item.setRange(xRange=(0, 1), yRange=(0, 1))
+
+    def export_svg(self):
+        """Exporta o gráfico como SVG (vetorial, para publicação)."""
+        filepath, _ = QFileDialog.getSaveFileName(self, "Exportar gráfico (vetorial)", "", "SVG (*.svg)")
+        if not filepath: return
+        if not filepath.lower().endswith('.svg'): filepath += '.svg'
+        # O arquivo vetorial leva as curvas completas: sem downsampling nem recorte à área visível durante a exportação
+        self.plot_item.setDownsampling(auto=False, ds=1); self.plot_item.setClipToView(False)
+        try: self._export_svg(filepath)
+        finally: self.plot_item.setDownsampling(auto=True, mode='peak'); self.plot_item.setClipToView(True)
+
+    def _export_svg(self, filepath):
+        try: pyqtgraph.exporters.SVGExporter(self.plot_item).export(filepath)
+        except ValueError:
+            # O exportador do pyqtgraph não reconhece o formato de path de algumas versões do Qt: renderiza direto
+            try: self._render_svg(filepath)
+            except Exception as e: QMessageBox.critical(self, "Erro", f"Não foi possível exportar o gráfico: {e}")
+        except Exception as e: QMessageBox.critical(self, "Erro", f"Não foi possível exportar o gráfico: {e}")
+
+    def _render_svg(self, filepath):
+        generator = QSvgGenerator()
+        generator.setFileName(filepath); generator.setSize(self.size()); generator.setViewBox(QRect(0, 0, self.width(), self.height()))
+        painter = QPainter(generator)
+        try: self.render(painter)
+        finally: painter.end()
+
+
+def dashed_pen(color, width=1.5):
+    return pg.mkPen(color=color, width=width, style=Qt.PenStyle.DashLine)
+
+
+def export_button(plot, label="Exportar SVG..."):
+    """Botão que exporta `plot` (FastPlot) em SVG."""
+    button = QPushButton(label)
+    button.setToolTip("Salva o gráfico em formato vetorial (SVG), para figuras de publicação.")
+    button.clicked.connect(plot.export_svg)
+    return button
@@ -0,0 +1,296 @@
+# rdf_engine.py
+import os
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from scipy.spatial import cKDTree
+
+from frame import wrap_into_box
+from trajectory_cache import TrajectoryCache, open_trajectory
+
+CHUNKS_PER_WORKER = 4 # Blocos de frames por processo: equilibra a carga e dá granularidade ao cancelamento
+
+
+def pair_histogram(tree1, tree2, rmax, nbins):
+    """Histograma das distâncias periódicas entre os pontos de `tree1` e `tree2` até `rmax`.
+
+    cKDTree.count_neighbors conta os pares direto por bin, sem gerar os arrays de pares.
+    Distâncias <= 1e-6 (o próprio átomo, quando as árvores são a mesma) ficam de fora.
+    """
+    edges = np.linspace(0.0, rmax, nbins + 1)
+    edges[0] = 1e-6
+    return tree1.count_neighbors(tree2, edges, cumulative=False)[1:].astype(np.int64)
+
+
+def rdf_frame_histogram(frame, code1, code2, rmax, nbins):
+    """Histograma de distâncias do par (code1, code2) em um frame.
+
+    Retorna (histograma, n1, n2, volume). Pares de um átomo com ele mesmo são descartados.
+    """
+    # Índice por elemento pré-calculado no frame, sem máscara sobre todos os átomos
+    indices1 = frame.indices_of(code1)
+    indices2 = indices1 if code1 == code2 else frame.indices_of(code2)
+    volume = frame.volume
+    if indices1.size == 0 or indices2.size == 0:
+        return np.zeros(nbins, dtype=np.int64), indices1.size, indices2.size, volume
+
+    wrapped, box = wrap_into_box(frame.coords, frame.box_bounds)
+    tree1 = cKDTree(wrapped[indices1], boxsize=box)
+    tree2 = tree1 if code1 == code2 else cKDTree(wrapped[indices2], boxsize=box)
+    return pair_histogram(tree1, tree2, rmax, nbins), indices1.size, indices2.size, volume
+
+
+def partial_rdf_histograms(frame, rmax, nbins):
+    """Histogramas de todos os pares de elementos de um frame.
+
+    Uma árvore periódica por elemento e um count_neighbors por par (a, b) com a <= b;
+    o par (b, a) tem as mesmas contagens. Retorna (histogramas (E, E, nbins), átomos
+    por código (E,), volume), com E = maior código de elemento no frame + 1.
+    """
+    elements = frame.elements
+    volume = frame.volume
+    num_codes = int(elements.max()) + 1 if elements.size else 0
+    counts = np.bincount(elements, minlength=num_codes).astype(np.int64)
+    hist = np.zeros((num_codes, num_codes, nbins), dtype=np.int64)
+    if elements.size < 2:
+        return hist, counts, volume
+
+    wrapped, box = wrap_into_box(frame.coords, frame.box_bounds)
+    trees = {code: cKDTree(wrapped[frame.indices_of(code)], boxsize=box) for code in np.flatnonzero(counts)}
+    for code1, code2 in itertools.combinations_with_replacement(sorted(trees), 2):
+        hist[code1, code2] = pair_histogram(trees[code1], trees[code2], rmax, nbins)
+        hist[code2, code1] = hist[code1, code2]
+    return hist, counts, volume
+
+
+class PairRDF:
+    """Acumula o histograma de um único par de elementos (code1, code2) ao longo dos frames."""
+
+    def __init__(self, code1, code2, rmax, nbins):
+        self.code1, self.code2 = code1, code2
+        self.rmax, self.nbins = rmax, nbins
+        self.hist = np.zeros(nbins, dtype=np.int64)
+        self.n1_total, self.norm_sum, self.num_frames = 0, 0.0, 0
+
+    def add_frame(self, frame):
+        hist, n1, n2, volume = rdf_frame_histogram(frame, self.code1, self.code2, self.rmax, self.nbins)
+        if n1 == 0 or n2 == 0: return
+        self.hist += hist
+        self.n1_total += n1
+        self.norm_sum += n1 * pair_density(n1, n2, volume, self.code1 == self.code2)
+        self.num_frames += 1
+
+    def merge(self, other, lookup=None):
+        """Soma o resultado de outro acumulador do mesmo par (ex.: de um processo trabalhador)."""
+        self.hist += other.hist
+        self.n1_total += other.n1_total; self.norm_sum += other.norm_sum; self.num_frames += other.num_frames
+
+    def result(self):
+        """(r, g(r), histograma, média de átomos de referência por frame), ou None sem frames válidos."""
+        if self.num_frames == 0: return None
+        r, g_r = rdf_normalize(self.hist, self.norm_sum, self.rmax, self.nbins)
+        return r, g_r, self.hist, self.n1_total / self.num_frames
+
+
+class PartialRDF:
+    """Acumula os histogramas de todos os pares de elementos ao longo dos frames.
+
+    Depois do cálculo, qualquer g(r) parcial (ou o total) sai dos dados guardados,
+    sem nova passagem pela trajetória.
+    """
+
+    def __init__(self, rmax, nbins):
+        self.rmax, self.nbins = rmax, nbins
+        self.hist = np.zeros((0, 0, nbins), dtype=np.int64)
+        self.counts = np.zeros(0, dtype=np.int64)  # Soma, sobre os frames, dos átomos de cada código
+        self.norm_sum = np.zeros((0, 0))            # Soma de n_a * densidade de b vista por a
+        self.num_frames = 0
+
+    def add_frame(self, frame):
+        hist, counts, volume = partial_rdf_histograms(frame, self.rmax, self.nbins)
+        num_codes = len(counts)
+        self._grow(num_codes)
+        self.hist[:num_codes, :num_codes] += hist
+        self.counts[:num_codes] += counts
+        # n_a * n_b / V entre espécies diferentes; n_a * (n_a - 1) / V na diagonal
+        self.norm_sum[:num_codes, :num_codes] += counts[:, None] * (counts[None, :] - np.eye(num_codes)) / volume
+        self.num_frames += 1
+
+    def merge(self, other, lookup):
+        """Soma outro acumulador; `lookup[c]` é o código deste acumulador para o código `c` do outro."""
+        lookup = np.asarray(lookup, dtype=np.intp)[:len(other.counts)]
+        if lookup.size == 0: return
+        self._grow(int(lookup.max()) + 1)
+        pairs = np.ix_(lookup, lookup)
+        self.hist[pairs] += other.hist
+        self.counts[lookup] += other.counts
+        self.norm_sum[pairs] += other.norm_sum
+        self.num_frames += other.num_frames
+
+    def _grow(self, num_codes):
+        # Elementos que só aparecem em frames posteriores ampliam a matriz
+        extra = num_codes - len(self.counts)
+        if extra <= 0: return
+        self.hist = np.pad(self.hist, ((0, extra), (0, extra), (0, 0)))
+        self.counts = np.pad(self.counts, (0, extra))
+        self.norm_sum = np.pad(self.norm_sum, ((0, extra), (0, extra)))
+
+    def pair(self, code1, code2):
+        """(r, g(r), histograma, média de átomos de referência por frame) do par (code1, code2)."""
+        if max(code1, code2) >= len(self.counts) or self.counts[code1] == 0 or self.norm_sum[code1, code2] == 0:
+            return None
+        hist = self.hist[code1, code2]
+        r, g_r = rdf_normalize(hist, self.norm_sum[code1, code2], self.rmax, self.nbins)
+        return r, g_r, hist, self.counts[code1] / self.num_frames
+
+    def total(self):
+        """(r, g(r), histograma, média de átomos por frame) considerando todos os átomos."""
+        if self.num_frames == 0: return None
+        hist = self.hist.sum(axis=(0, 1))
+        r, g_r = rdf_normalize(hist, self.norm_sum.sum(), self.rmax, self.nbins)
+        return r, g_r, hist, self.counts.sum() / self.num_frames
+
+
+def rdf_normalize(hist, norm_sum, rmax, nbins):
+    """Converte o histograma acumulado em g(r).
+
+    `norm_sum` é a soma, sobre os frames, de n1 * densidade do grupo 2 (por frame, o
+    que mantém a normalização correta quando o volume da caixa varia, como em NPT).
+    """
+    dr = rmax / nbins
+    r = (np.arange(nbins) + 0.5) * dr
+    shell_volume = 4.0 * np.pi * r**2 * dr
+    g_r = hist / (shell_volume + 1e-9) / (norm_sum + 1e-9)
+    return r, g_r
+
+
+def pair_density(n1, n2, volume, same_species):
+    """Densidade numérica do grupo 2 vista por um átomo do grupo 1."""
+    return (n1 - 1) / volume if same_species else n2 / volume
+
+
+def rdf_change(g_old, g_new):
+    """Variação relativa (norma L2) entre duas estimativas de g(r): critério de convergência."""
+    return float(np.linalg.norm(g_new - g_old) / (np.linalg.norm(g_new) + 1e-12))
+
+
+def interleaved_frame_order(num_frames, batch_frames):
+    """Ordem dos frames em que cada bloco consecutivo de ~`batch_frames` cobre a trajetória inteira.
+
+    Assim as estimativas parciais de um cálculo progressivo já representam o trecho
+    todo, e não apenas o início da simulação.
+    """
+    stride = max(1, num_frames // max(batch_frames, 1))
+    return np.concatenate([np.arange(offset, num_frames, stride) for offset in range(stride)])
+
+
+# --- Cálculo paralelo por frames ---
+def make_rdf_accumulator(trajectory, pair, rmax, nbins):
+    """PairRDF para `pair` = (elemento 1, elemento 2), ou PartialRDF de todos os pares se `pair` for None."""
+    if pair is None: return PartialRDF(rmax, nbins)
+    return PairRDF(trajectory.element_code(pair[0]), trajectory.element_code(pair[1]), rmax, nbins)
+
+
+_worker_state = {}
+
+
+def _init_rdf_worker(cancel_event, progress):
+    _worker_state['cancel'] = cancel_event
+    _worker_state['progress'] = progress
+
+
+def _rdf_chunk(filepath, use_cache, frame_indices, pair, rmax, nbins):
+    """Tarefa de um processo trabalhador: acumula os histogramas de um bloco de frames."""
+    cancel_event, progress = _worker_state['cancel'], _worker_state['progress']
+    trajectory = open_trajectory(filepath, use_cache)
+    accumulator = make_rdf_accumulator(trajectory, pair, rmax, nbins)
+    for frame in trajectory.iter_frames(frame_indices):
+        if cancel_event.is_set(): return None
+        accumulator.add_frame(frame)
+        with progress.get_lock(): progress.value += 1
+    return accumulator, list(trajectory.element_names)
+
+
+class ParallelRDF:
+    """RDF distribuído por frames em um pool de processos, sem bloquear quem o chama.
+
+    Cada processo abre a trajetória pelo caminho, acumula os histogramas de blocos de
+    frames e devolve o acumulador parcial; `poll()` soma os blocos concluídos em `result`.
+    O progresso (frames processados) é contado em memória compartilhada, e `cancel()`
+    sinaliza os processos por um Event e descarta os blocos ainda na fila.
+    """
+
+    def __init__(self, trajectory, filepath, pair, rmax, nbins, frame_indices, workers=None, num_chunks=None):
+        self.trajectory = trajectory
+        self.result = make_rdf_accumulator(trajectory, pair, rmax, nbins)
+        self.total_frames = len(frame_indices)
+        self.frames_merged = 0 # Frames já somados em `result`
+        workers = workers or os.cpu_count() or 1
+        context = multiprocessing.get_context()
+        self._cancel_event = context.Event()
+        self._progress = context.Value('q', 0)
+        self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_rdf_worker,
+                                             initargs=(self._cancel_event, self._progress))
+        use_cache = isinstance(trajectory, TrajectoryCache)
+        num_chunks = num_chunks or CHUNKS_PER_WORKER * workers
+        chunks = np.array_split(np.asarray(frame_indices, dtype=np.int64), max(1, min(len(frame_indices), num_chunks)))
+        self._futures = {self._executor.submit(_rdf_chunk, filepath, use_cache, chunk.tolist(), pair, rmax, nbins): chunk.size
+                         for chunk in chunks if chunk.size}
+
+    @property
+    def frames_done(self):
+        return self._progress.value
+
+    def poll(self):
+        """Incorpora os blocos já concluídos. Retorna True quando não resta nenhum.
+
+        Erros de um processo trabalhador são propagados aqui.
+        """
+        for future in [f for f in self._futures if f.done()]:
+            chunk_size = self._futures.pop(future)
+            chunk_result = future.result()
+            if chunk_result is None: continue
+            accumulator, element_names = chunk_result
+            # Cada processo numera os elementos à sua maneira: traduz para os códigos desta trajetória
+            self.result.merge(accumulator, [self.trajectory.element_code(name) for name in element_names])
+            self.frames_merged += chunk_size
+        if not self._futures: self._executor.shutdown(wait=False)
+        return not self._futures
+
+    def cancel(self):
+        self._cancel_event.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._futures = {}
+
+
+class SerialRDF:
+    """Mesma interface de ParallelRDF, no próprio processo: cada poll() acumula `batch_frames` frames.
+
+    Chamado por um timer, mantém a interface responsiva e permite redesenhar e
+    cancelar entre os blocos.
+    """
+
+    def __init__(self, trajectory, pair, rmax, nbins, frame_indices, batch_frames):
+        self.result = make_rdf_accumulator(trajectory, pair, rmax, nbins)
+        self.total_frames = len(frame_indices)
+        self.frames_merged = 0
+        self.batch_frames = batch_frames
+        self._frames = trajectory.iter_frames(frame_indices)
+
+    @property
+    def frames_done(self):
+        return self.frames_merged
+
+    def poll(self):
+        processed = 0
+        for frame in itertools.islice(self._frames, self.batch_frames):
+            self.result.add_frame(frame)
+            processed += 1
+        self.frames_merged += processed
+        finished = processed < self.batch_frames or self.frames_merged >= self.total_frames
+        if finished: self._frames.close()
+        return finished
+
+    def cancel(self):
+        self._frames.close()
@@ -0,0 +1,135 @@
+# reaction_tracker.py
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+from bond_engine import BOND_TOLERANCE, frame_bonds
+from trajectory_cache import open_trajectory
+from reaxff_bonds import DEFAULT_BOND_ORDER_CUTOFF
+from species_engine import molecules_from_bonds, molecule_formulas
+
+
+class ReactionEvent:
+    """Uma reação detectada entre dois frames consecutivos (fórmulas ordenadas de reagentes e produtos)."""
+
+    __slots__ = ('timestep', 'reactants', 'products', 'num_atoms')
+
+    def __init__(self, timestep, reactants, products, num_atoms):
+        self.timestep = timestep
+        self.reactants = reactants
+        self.products = products
+        self.num_atoms = num_atoms
+
+    @property
+    def equation(self):
+        return reaction_equation(self.reactants, self.products)
+
+
+def reaction_equation(reactants, products):
+    return " + ".join(reactants) + " → " + " + ".join(products)
+
+
+class ReactionTracker:
+    """Rastreia reações comparando as moléculas de frames consecutivos pelos ids de átomo compartilhados.
+
+    A sobreposição entre moléculas do frame anterior e do atual é uma matriz esparsa
+    (moléculas anteriores x atuais) montada de uma vez a partir dos átomos em comum.
+    Os componentes conexos desse grafo bipartido que não são 1 para 1 são as reações
+    (quebras, combinações e trocas de átomos). Só o frame anterior fica em memória,
+    então os frames podem ser acrescentados à medida que são lidos.
+
+    Resultados acumulados:
+      events    -> lista de ReactionEvent, em ordem de timestep
+      reactions -> {(reagentes, produtos): ocorrências}
+      network   -> {(espécie reagente, espécie produto): ocorrências}, arestas do grafo de reações
+    """
+
+    def __init__(self):
+        self.events = []
+        self.reactions = {}
+        self.network = {}
+        self.frames_seen = 0
+        self._previous = None
+
+    def add_frame(self, timestep, ids, labels, formulas):
+        """Acrescenta um frame (ids de átomo, molécula de cada átomo, fórmula de cada molécula); devolve os eventos novos."""
+        ids = np.asarray(ids); labels = np.asarray(labels, dtype=np.intp)
+        previous, self._previous = self._previous, (ids, labels, formulas)
+        self.frames_seen += 1
+        if previous is None: return []
+        previous_ids, previous_labels, previous_formulas = previous
+        num_previous, num_current = len(previous_formulas), len(formulas)
+
+        # Átomos em comum: mesma ordem de ids no caso usual, interseção ordenada caso contrário
+        if np.array_equal(previous_ids, ids):
+            a = b = np.arange(len(ids))
+        else:
+            order_previous, order_current = np.argsort(previous_ids, kind='stable'), np.argsort(ids, kind='stable')
+            _, a, b = np.intersect1d(previous_ids[order_previous], ids[order_current], assume_unique=True, return_indices=True)
+            a, b = order_previous[a], order_current[b]
+        overlap = coo_matrix((np.ones(len(a), dtype=np.int32), (previous_labels[a], labels[b])),
+                             shape=(num_previous, num_current)).tocsr() # Entradas repetidas são somadas
+        rows, cols = overlap.nonzero()
+
+        # Grafo bipartido: nós 0..P-1 são as moléculas anteriores, P..P+C-1 as atuais
+        num_nodes = num_previous + num_current
+        graph = coo_matrix((np.ones(len(rows), dtype=np.int8), (rows, num_previous + cols)), shape=(num_nodes, num_nodes))
+        num_components, components = connected_components(graph, directed=False)
+        previous_count = np.bincount(components[:num_previous], minlength=num_components)
+        current_count = np.bincount(components[num_previous:], minlength=num_components)
+        atom_count = np.bincount(components[previous_labels[a]], minlength=num_components)
+        reactive = np.flatnonzero((previous_count > 0) & (current_count > 0) & ((previous_count > 1) | (current_count > 1)))
+        if reactive.size == 0: return []
+
+        order = np.argsort(components, kind='stable')
+        starts = np.concatenate(([0], np.cumsum(np.bincount(components, minlength=num_components))))
+        new_events = []
+        for component in reactive:
+            nodes = order[starts[component]:starts[component + 1]]
+            reactants = tuple(sorted(previous_formulas[n] for n in nodes[nodes < num_previous]))
+            products = tuple(sorted(formulas[n - num_previous] for n in nodes[nodes >= num_previous]))
+            if reactants == products: continue # Troca de átomos entre moléculas iguais, sem mudança líquida
+            new_events.append(ReactionEvent(timestep, reactants, products, int(atom_count[component])))
+        for event in new_events:
+            key = (event.reactants, event.products)
+            self.reactions[key] = self.reactions.get(key, 0) + 1
+            for reactant in set(event.reactants):
+                for product in set(event.products):
+                    self.network[(reactant, product)] = self.network.get((reactant, product), 0) + 1
+        self.events.extend(new_events)
+        return new_events
+
+    def write_events(self, filepath):
+        """Salva a lista de eventos em texto separado por tabulações."""
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write("timestep\treagentes\tprodutos\tatomos\n")
+            for event in self.events:
+                f.write(f"{event.timestep}\t{' + '.join(event.reactants)}\t{' + '.join(event.products)}\t{event.num_atoms}\n")
+
+    def write_network(self, filepath):
+        """Salva o grafo de reações como lista de arestas ponderadas (reagente, produto, ocorrências)."""
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write("reagente\tproduto\tocorrencias\n")
+            for (reactant, product), count in sorted(self.network.items(), key=lambda item: -item[1]):
+                f.write(f"{reactant}\t{product}\t{count}\n")
+
+
+def track_trajectory(filepath, use_cache=False, tolerance=BOND_TOLERANCE, frame_indices=None, tracker=None, element_order=None):
+    """Rastreia as reações de uma trajetória, com ligações pelos raios covalentes (fórmulas na ordem `element_order`)."""
+    tracker = tracker or ReactionTracker()
+    for frame in open_trajectory(filepath, use_cache).iter_frames(frame_indices):
+        num_molecules, labels = molecules_from_bonds(len(frame), frame_bonds(frame, tolerance))
+        formulas = molecule_formulas(labels, num_molecules, frame.elements.astype(np.intp), frame.element_names, element_order)
+        tracker.add_frame(frame.timestep, frame.ids, labels, formulas)
+    return tracker
+
+
+def track_bonds(bonds, type_names, cutoff=DEFAULT_BOND_ORDER_CUTOFF, tracker=None):
+    """Rastreia as reações de um arquivo do fix reaxff/bonds (ReaxFFBonds), com o corte de ordem de ligação dado."""
+    tracker = tracker or ReactionTracker()
+    for frame in (bonds.frames if bonds.frames is not None else bonds.iter_frames()):
+        num_molecules, labels = frame.molecules(cutoff)
+        element_names = frame.element_names(type_names)
+        formulas = molecule_formulas(labels, num_molecules, frame.types.astype(np.intp) - 1, element_names, element_order=element_names)
+        tracker.add_frame(frame.timestep, frame.ids, labels, formulas)
+    return tracker
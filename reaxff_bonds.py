@@ -0,0 +1,124 @@
+# reaxff_bonds.py
+import itertools
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+
+from compressed_io import open_binary
+from species_engine import species_counts
+
+DEFAULT_BOND_ORDER_CUTOFF = 0.3 # Mesmo padrão do fix reaxff/species
+
+
+def is_reaxff_bonds_file(filepath):
+    """True se o arquivo parece uma saída do fix reaxff/bonds (começa com '# Timestep <N>').
+
+    O species.log também começa com '# Timestep', mas seguido dos nomes das colunas.
+    """
+    try:
+        with open_binary(filepath) as f: parts = f.readline().split()
+        return parts[:2] == [b"#", b"Timestep"] and len(parts) == 3 and parts[2].isdigit()
+    except OSError:
+        return False
+
+
+class BondOrderFrame:
+    """Um frame do arquivo de ligações: ids, tipos, cargas e a matriz esparsa (CSR) de ordens de ligação.
+
+    Linhas e colunas da matriz seguem a ordem crescente de id; a matriz é simétrica,
+    pois o LAMMPS lista cada ligação nos dois átomos.
+    """
+
+    __slots__ = ('timestep', 'ids', 'types', 'charges', 'bond_orders')
+
+    def __init__(self, timestep, ids, types, charges, bond_orders):
+        self.timestep = timestep
+        self.ids = ids
+        self.types = types
+        self.charges = charges
+        self.bond_orders = bond_orders
+
+    def __len__(self):
+        return len(self.ids)
+
+    def molecules(self, cutoff=DEFAULT_BOND_ORDER_CUTOFF):
+        """(número de moléculas, rótulo de cada átomo) considerando ligações com ordem >= `cutoff`."""
+        graph = self.bond_orders >= cutoff
+        return connected_components(graph, directed=False)
+
+    def element_names(self, type_names):
+        """Tabela de elementos indexada por tipo - 1 (tipo 1 = primeiro nome); tipos sem nome viram 'X<tipo>'."""
+        names = list(type_names)
+        max_type = int(self.types.max()) if len(self.types) else 0
+        return names + [f"X{t}" for t in range(len(names) + 1, max_type + 1)]
+
+    def species(self, type_names, cutoff=DEFAULT_BOND_ORDER_CUTOFF):
+        """{fórmula: contagem} com o elemento de cada tipo LAMMPS dado por `type_names`; fórmulas na ordem dos tipos, como no species.log."""
+        num_molecules, labels = self.molecules(cutoff)
+        element_names = self.element_names(type_names)
+        return species_counts(labels, num_molecules, self.types.astype(np.intp) - 1, element_names, element_order=element_names)
+
+
+class ReaxFFBonds:
+    """Leitor em streaming da saída do fix reaxff/bonds.
+
+    Cada frame vira um BondOrderFrame com as ordens de ligação em CSR (float32), de
+    modo que as moléculas podem ser recalculadas para qualquer corte de ordem de
+    ligação sem rodar a simulação de novo. `load()` guarda os frames em memória
+    para recálculos rápidos; `iter_frames()` lê um frame por vez.
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.frames = None
+
+    def iter_frames(self):
+        with open_binary(self.filepath) as f:
+            timestep = None; num_atoms = 0
+            for line in f:
+                if line.startswith(b"# Timestep"):
+                    timestep = int(line.split()[2])
+                elif line.startswith(b"# Number of particles"):
+                    num_atoms = int(line.split()[4])
+                elif line.startswith(b"# id type nb"):
+                    lines = list(itertools.islice(f, num_atoms))
+                    if len(lines) < num_atoms: return # Frame truncado (simulação em andamento)
+                    yield self._parse_block(timestep, lines)
+
+    def load(self):
+        if self.frames is None: self.frames = list(self.iter_frames())
+        return self.frames
+
+    def species_table(self, type_names, cutoff=DEFAULT_BOND_ORDER_CUTOFF):
+        """Tabela timestep -> {fórmula: contagem}, com os mesmos nomes de espécie do species.log (elementos na ordem de `type_names`)."""
+        return {frame.timestep: frame.species(type_names, cutoff) for frame in self.load()}
+
+    @staticmethod
+    def _parse_block(timestep, lines):
+        # Cada linha: id type nb id_1..id_nb mol bo_1..bo_nb abo nlp q (2*nb + 7 colunas)
+        rows = [line.split() for line in lines]
+        lengths = np.fromiter(map(len, rows), dtype=np.int64, count=len(rows))
+        values = np.fromiter(map(float, itertools.chain.from_iterable(rows)), dtype=np.float64, count=int(lengths.sum()))
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        ids = values[starts].astype(np.int64)
+        types = values[starts + 1].astype(np.int32)
+        num_bonds = values[starts + 2].astype(np.int64)
+        if np.any(lengths != 2 * num_bonds + 7):
+            raise ValueError(f"Linha malformada no arquivo de ligações (timestep {timestep}).")
+        charges = values[starts + lengths - 1]
+
+        # Posições dos ids vizinhos e das ordens de ligação na lista de valores, sem laço por átomo
+        bond_starts = np.concatenate(([0], np.cumsum(num_bonds)))
+        offsets = np.arange(bond_starts[-1]) - np.repeat(bond_starts[:-1], num_bonds)
+        neighbor_positions = np.repeat(starts + 3, num_bonds) + offsets
+        neighbor_ids = values[neighbor_positions].astype(np.int64)
+        orders = values[neighbor_positions + np.repeat(num_bonds, num_bonds) + 1].astype(np.float32)
+
+        order = np.argsort(ids, kind='stable')
+        sorted_ids = ids[order]
+        rank = np.empty_like(order); rank[order] = np.arange(len(order))
+        rows_index = np.repeat(rank, num_bonds)
+        cols_index = np.minimum(np.searchsorted(sorted_ids, neighbor_ids), len(sorted_ids) - 1)
+        known = sorted_ids[cols_index] == neighbor_ids
+        bond_orders = csr_matrix((orders[known], (rows_index[known], cols_index[known])), shape=(len(ids), len(ids)))
+        return BondOrderFrame(timestep, sorted_ids.astype(np.int32), types[order], charges[order], bond_orders)
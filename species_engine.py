@@ -0,0 +1,92 @@
+# species_engine.py
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+from bond_engine import BOND_TOLERANCE, frame_bonds
+from trajectory_cache import open_trajectory
+
+CHUNKS_PER_WORKER = 4
+
+
+def species_formula(element_names, counts, element_order=None):
+    """Fórmula como o fix reaxff/species escreve: elementos na ordem dos tipos, contagem só quando > 1.
+
+    `element_order` é a lista de elementos por tipo LAMMPS (a do 'element' do fix, ex.
+    ['H', 'O', 'C'] -> H2O, H4C, O2C); sem ela, vale a ordem de `element_names`.
+    Elementos presentes que não estão em `element_order` vêm no fim.
+    """
+    present = {element_names[code]: int(n) for code, n in enumerate(counts) if n > 0}
+    order = [name for name in (element_order or []) if name in present]
+    order += [name for name in present if name not in order]
+    return "".join(name + (str(present[name]) if present[name] > 1 else "") for name in order)
+
+
+def molecules_from_bonds(num_atoms, bonds):
+    """(número de moléculas, rótulo da molécula de cada átomo) pelos componentes conexos do grafo de ligações."""
+    graph = coo_matrix((np.ones(len(bonds), dtype=np.int8), (bonds[:, 0], bonds[:, 1])), shape=(num_atoms, num_atoms))
+    return connected_components(graph, directed=False)
+
+
+def species_counts(labels, num_molecules, elements, element_names, element_order=None):
+    """{fórmula: número de moléculas} a partir dos rótulos de molécula e dos códigos de elemento."""
+    num_codes = len(element_names)
+    # Composição de cada molécula: um bincount sobre (molécula, elemento)
+    composition = np.bincount(labels * num_codes + elements, minlength=num_molecules * num_codes).reshape(num_molecules, num_codes)
+    unique_rows, multiplicity = np.unique(composition, axis=0, return_counts=True)
+    species = {}
+    for row, count in zip(unique_rows, multiplicity):
+        formula = species_formula(element_names, row, element_order)
+        species[formula] = species.get(formula, 0) + int(count)
+    return species
+
+
+def molecule_formulas(labels, num_molecules, elements, element_names, element_order=None):
+    """Fórmula de cada molécula (lista indexada pelo rótulo); cada composição distinta é formatada uma única vez."""
+    num_codes = len(element_names)
+    composition = np.bincount(labels * num_codes + elements, minlength=num_molecules * num_codes).reshape(num_molecules, num_codes)
+    unique_rows, inverse = np.unique(composition, axis=0, return_inverse=True)
+    formulas = [species_formula(element_names, row, element_order) for row in unique_rows]
+    return [formulas[k] for k in inverse.ravel()]
+
+
+def frame_species(frame, tolerance=BOND_TOLERANCE, element_order=None):
+    """{fórmula: contagem} de um Frame, com ligações pelos raios covalentes (imagens periódicas incluídas)."""
+    bonds = frame_bonds(frame, tolerance)
+    num_molecules, labels = molecules_from_bonds(len(frame), bonds)
+    return species_counts(labels, num_molecules, frame.elements.astype(np.intp), frame.element_names, element_order)
+
+
+def _species_chunk(filepath, use_cache, frame_indices, tolerance, element_order=None):
+    """Tarefa de um processo trabalhador: espécies de um bloco de frames."""
+    trajectory = open_trajectory(filepath, use_cache)
+    return [(frame.timestep, frame_species(frame, tolerance, element_order)) for frame in trajectory.iter_frames(frame_indices)]
+
+
+def species_from_trajectory(filepath, use_cache=False, workers=None, tolerance=BOND_TOLERANCE, frame_indices=None, element_order=None):
+    """Tabela timestep -> {fórmula: contagem} da trajetória, no mesmo formato do species.log.
+
+    `element_order` é a ordem dos tipos LAMMPS (a do species.log); os elementos do dump
+    aparecem na ordem em que foram lidos, que em geral não é essa.
+
+    Os frames são distribuídos em blocos entre `workers` processos (todos os núcleos por
+    padrão); com um único processo, roda aqui mesmo, sem o custo de criar o pool. Dumps
+    comprimidos (sem cache válido) também rodam aqui: cada processo teria de descomprimir
+    o arquivo desde o início para chegar ao seu bloco.
+    """
+    trajectory = open_trajectory(filepath, use_cache)
+    if frame_indices is None: frame_indices = range(len(trajectory))
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or getattr(trajectory, 'compression', None):
+        return dict(_species_chunk(filepath, use_cache, frame_indices, tolerance, element_order))
+
+    chunks = np.array_split(np.asarray(frame_indices, dtype=np.int64), max(1, min(len(frame_indices), CHUNKS_PER_WORKER * workers)))
+    chunks = [chunk.tolist() for chunk in chunks if chunk.size]
+    table = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for results in executor.map(_species_chunk, [filepath] * len(chunks), [use_cache] * len(chunks), chunks, [tolerance] * len(chunks),
+                                    [element_order] * len(chunks)):
+            table.update(results)
+    return table
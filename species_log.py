@@ -0,0 +1,201 @@
+# species_log.py
+import os
+import numpy as np
+
+import parse_cache
+
+
+class SpeciesTable:
+    """Contagens de espécies em forma colunar: matriz densa int32 (timesteps x espécies).
+
+    `timesteps` é crescente, `species` é a lista de fórmulas (uma coluna cada; em
+    ordem alfabética quando vem do parser, em ordem de aparecimento no modo de
+    acompanhamento) e `counts[i, j]` é o número de moléculas da espécie j no
+    timestep i (zero quando a espécie não aparece naquele timestep).
+    """
+
+    __slots__ = ('timesteps', 'species', 'counts', '_index', '_ranking')
+
+    def __init__(self, timesteps, species, counts):
+        self.timesteps = timesteps
+        self.species = species
+        self.counts = counts
+        self._index = {name: j for j, name in enumerate(species)}
+        self._ranking = None
+
+    def __len__(self):
+        return len(self.timesteps)
+
+    @classmethod
+    def from_dict(cls, table):
+        """Converte uma tabela timestep -> {fórmula: contagem} (trajetória, bonds ReaxFF)."""
+        timesteps = sorted(table)
+        species = sorted({name for counts in table.values() for name in counts})
+        index = {name: j for j, name in enumerate(species)}
+        counts = np.zeros((len(timesteps), len(species)), dtype=np.int32)
+        for i, timestep in enumerate(timesteps):
+            row = table[timestep]
+            counts[i, [index[name] for name in row]] = list(row.values())
+        return cls(np.array(timesteps, dtype=np.int64), species, counts)
+
+    def index_of(self, name):
+        """Coluna da espécie, ou -1 se ela nunca aparece."""
+        return self._index.get(name, -1)
+
+    def column(self, name):
+        """Série temporal de uma espécie (zeros se ela nunca aparece)."""
+        j = self.index_of(name)
+        return self.counts[:, j] if j >= 0 else np.zeros(len(self.timesteps), dtype=np.int32)
+
+    def ranking(self):
+        """Espécies presentes em cada timestep, da maior para a menor contagem, em forma CSR.
+
+        Devolve (indptr, columns, values, cumulative): as entradas do timestep i ficam em
+        indptr[i]:indptr[i+1] e a soma das entradas a..b-1 é cumulative[b] - cumulative[a].
+        Calculado uma única vez para a tabela inteira, com um lexsort sobre as entradas não nulas.
+        """
+        if self._ranking is None:
+            rows, columns = np.nonzero(self.counts)
+            values = self.counts[rows, columns]
+            order = np.lexsort((-values, rows)) # Por timestep; dentro dele, contagem decrescente (empates na ordem das colunas)
+            rows, columns, values = rows[order], columns[order].astype(np.int32), values[order]
+            indptr = np.searchsorted(rows, np.arange(len(self.timesteps) + 1))
+            cumulative = np.concatenate(([0], np.cumsum(values, dtype=np.int64)))
+            self._ranking = (indptr, columns, values, cumulative)
+        return self._ranking
+
+
+def parse_species_log(log_file):
+    """Lê um species.log (fix reaxff/species) para uma SpeciesTable.
+
+    Cada bloco é uma linha de cabeçalho '# Timestep No_Moles No_Specs <fórmulas>'
+    seguida da linha de dados. Os nomes viram índices de coluna por dicionário (cada
+    cabeçalho distinto é resolvido uma única vez) e as contagens são convertidas e
+    espalhadas na matriz de uma só vez. Timesteps repetidos (reinícios) ficam com o
+    último bloco, como antes.
+    """
+    if not os.path.exists(log_file): return ('error', f"Arquivo não encontrado: {log_file}")
+    index = {}; header_columns = {}; blocks = {}; header = None
+    try:
+        with open(log_file, 'rb') as f:
+            for line in f:
+                if line.startswith(b'#'):
+                    header = line; continue
+                if header is None: continue
+                data_parts = line.split()
+                if data_parts and data_parts[0].isdigit():
+                    columns = header_columns.get(header)
+                    if columns is None:
+                        names = header.split()[4:] # '#', 'Timestep', 'No_Moles', 'No_Specs'
+                        columns = header_columns[header] = [index.setdefault(name, len(index)) for name in names]
+                    blocks[int(data_parts[0])] = (columns, data_parts[3:3 + len(columns)])
+                header = None
+    except Exception as e: return ('error', f"Não foi possível ler o arquivo: {e}")
+    if not blocks: return ('error', "Nenhum dado de espécies válido encontrado no arquivo.")
+
+    timesteps = sorted(blocks)
+    columns, values = [], []
+    for timestep in timesteps:
+        block_columns, block_values = blocks[timestep]
+        columns.extend(block_columns); values.extend(block_values)
+    rows = np.repeat(np.arange(len(timesteps)), [len(blocks[timestep][0]) for timestep in timesteps])
+
+    # Colunas em ordem alfabética, como a lista de espécies da interface: renumera antes de espalhar
+    names = [name.decode() for name in index]
+    order = np.argsort(names, kind='stable')
+    rank = np.empty(len(order), dtype=np.int64); rank[order] = np.arange(len(order))
+    counts = np.zeros((len(timesteps), len(names)), dtype=np.int32)
+    counts[rows, rank[np.array(columns, dtype=np.int64)]] = np.array(values, dtype=np.int64)
+    return ('success', SpeciesTable(np.array(timesteps, dtype=np.int64), [names[j] for j in order], counts))
+
+
+class SpeciesLogFollower:
+    """Acompanha um species.log que ainda está sendo escrito (simulação em andamento).
+
+    Cada `poll()` lê só os bytes acrescentados desde o último offset; uma linha
+    incompleta no fim fica guardada para a próxima leitura. As linhas novas da
+    matriz são escritas em arrays com capacidade dobrada sob demanda, e espécies
+    novas ganham colunas no fim, então nada do que já foi lido é reprocessado.
+    Se o arquivo encolher (nova simulação no mesmo diretório), recomeça do zero.
+    """
+
+    def __init__(self, log_file):
+        self.log_file = log_file
+        self._reset()
+
+    def _reset(self):
+        self.offset = 0
+        self.species = []
+        self.num_rows = 0
+        self._index = {}; self._header_columns = {}
+        self._remainder = b""; self._header = None
+        self._timesteps = np.zeros(16, dtype=np.int64)
+        self._counts = np.zeros((16, 16), dtype=np.int32)
+
+    def poll(self):
+        """Lê o que foi acrescentado ao arquivo; devolve o número de timesteps novos (ou atualizados)."""
+        try: size = os.path.getsize(self.log_file)
+        except OSError: return 0 # Ainda não criado pelo LAMMPS
+        if size < self.offset: self._reset()
+        if size == self.offset: return 0
+        with open(self.log_file, 'rb') as f:
+            f.seek(self.offset); chunk = f.read(size - self.offset)
+        self.offset += len(chunk)
+        lines = (self._remainder + chunk).split(b'\n')
+        self._remainder = lines.pop() # Sem '\n' final: linha ainda sendo escrita
+        updated = 0
+        for line in lines:
+            if line.startswith(b'#'):
+                self._header = line; continue
+            if self._header is None: continue
+            data_parts = line.split()
+            if data_parts and data_parts[0].isdigit():
+                columns = self._columns_for(self._header)
+                self._add_row(int(data_parts[0]), columns, data_parts[3:3 + len(columns)]); updated += 1
+            self._header = None
+        return updated
+
+    def _columns_for(self, header):
+        columns = self._header_columns.get(header)
+        if columns is None:
+            for name in header.split()[4:]:
+                if name not in self._index: self._index[name] = len(self.species); self.species.append(name.decode())
+            columns = self._header_columns[header] = np.array([self._index[name] for name in header.split()[4:]], dtype=np.int64)
+        return columns
+
+    def _add_row(self, timestep, columns, values):
+        row = self.num_rows
+        if row and self._timesteps[row - 1] == timestep:
+            row -= 1; self._counts[row] = 0 # Timestep repetido na fronteira entre runs: fica o último
+        else:
+            self.num_rows += 1
+        row_capacity, column_capacity = self._counts.shape
+        if self.num_rows > row_capacity: row_capacity = max(self.num_rows, 2 * row_capacity)
+        if len(self.species) > column_capacity: column_capacity = max(len(self.species), 2 * column_capacity)
+        if (row_capacity, column_capacity) != self._counts.shape:
+            grown = np.zeros((row_capacity, column_capacity), dtype=np.int32)
+            grown[:self._counts.shape[0], :self._counts.shape[1]] = self._counts; self._counts = grown
+            self._timesteps = np.resize(self._timesteps, row_capacity)
+        self._timesteps[row] = timestep
+        self._counts[row, columns] = np.array(values, dtype=np.int64)
+
+    def table(self):
+        """SpeciesTable com tudo o que já foi lido (visões dos arrays internos, sem cópia)."""
+        return SpeciesTable(self._timesteps[:self.num_rows], list(self.species), self._counts[:self.num_rows, :len(self.species)])
+
+
+def load_species_log(log_file):
+    """parse_species_log com cache em disco: reaberturas do mesmo arquivo (tamanho/mtime iguais) não reprocessam o texto."""
+    cached = parse_cache.load(log_file, 'species')
+    if cached is not None:
+        counts = np.zeros((len(cached['timesteps']), len(cached['species'])), dtype=np.int32)
+        counts[cached['rows'], cached['columns']] = cached['values']
+        return ('success', SpeciesTable(cached['timesteps'], cached['species'].tolist(), counts))
+    status, table = parse_species_log(log_file)
+    if status == 'success':
+        # A matriz é quase toda zeros: no disco só vão as entradas não nulas
+        rows, columns = np.nonzero(table.counts)
+        parse_cache.store(log_file, 'species', {'timesteps': table.timesteps, 'species': np.array(table.species, dtype=str),
+                                                'rows': rows.astype(np.int32), 'columns': columns.astype(np.int32),
+                                                'values': table.counts[rows, columns]})
+    return (status, table)
@@ -1,48 +1,45 @@
 # tab_analysis.py
+import os
 import numpy as np
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QComboBox, 
                              QCheckBox, QLabel, QFileDialog, QMessageBox, QFrame,
-                             QTableWidget, QTableWidgetItem, QHeaderView)
-from PyQt6.QtCore import Qt
+                             QTableWidget, QTableWidgetItem, QHeaderView, QProgressBar,
+                             QSpinBox, QDoubleSpinBox)
+from PyQt6.QtCore import Qt, QTimer
 
-import matplotlib
-matplotlib.use('Qt5Agg') # Matplotlib backend para PyQt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
+import pyqtgraph as pg
 
 from scipy.stats import linregress
-from scipy.spatial import cKDTree
 from scipy.signal import find_peaks
+from scipy.integrate import trapezoid
 
-class MplCanvas(FigureCanvas):
-    """Widget de canvas do Matplotlib para integrar com PyQt."""
-    def __init__(self, parent=None, width=5, height=4, dpi=100):
-        self.fig = Figure(figsize=(width, height), dpi=dpi, facecolor="#2c2e3a")
-        self.axes = self.fig.add_subplot(111)
-        self._style_plot("Gráfico", "X", "Y") # Estilo inicial
-        super().__init__(self.fig)
-
-    def _style_plot(self, title, xlabel, ylabel):
-        self.axes.clear()
-        self.axes.set_facecolor("#2c2e3a")
-        self.axes.set_title(title, color="#e0e0e0", fontsize=12, weight='bold')
-        self.axes.set_xlabel(xlabel, color="#b0b0b0")
-        self.axes.set_ylabel(ylabel, color="#b0b0b0")
-        for spine in self.axes.spines.values():
-            spine.set_color("#555")
-        self.axes.tick_params(axis='x', colors="#e0e0e0")
-        self.axes.tick_params(axis='y', colors="#e0e0e0")
-        self.axes.grid(True, linestyle='--', alpha=0.2, color="#777")
-        self.fig.tight_layout()
+from dump_reader import DumpReader
+from trajectory_cache import TrajectoryCache
+from rdf_engine import (PartialRDF, ParallelRDF, SerialRDF, make_rdf_accumulator, rdf_change,
+                        interleaved_frame_order)
+from msd_engine import msd_fft, unwrap_positions, PositionUnwrapper
+from correlator import MultiTauCorrelator
+from plot_widgets import FastPlot, dashed_pen, export_button
 
+TOTAL_RDF_LABEL = "Total"
+TIMESTEP_FS = 0.25 # ASSUMIDO! O ideal é pegar isso do script de input
+CORRELATION_QUANTITIES = ["MSD", "VACF", "ACF de carga"]
+MSD_BACKENDS = ["FFT (todas as origens)", "Multi-tau (streaming)"]
 
 class AnalysisTab(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.frames = []
-        self.box_dims = None
+        self.trajectory = None
+        self.trajectory_path = None
+        self.element_names = []
         self.unique_elements = []
         self.rdf_data = {}
+        self.partial_rdf = None # Histogramas de todos os pares, guardados para trocar de par sem recalcular
+        self.rdf_job = None
+        self.rdf_job_timer = QTimer(self); self.rdf_job_timer.setInterval(200)
+        self.rdf_job_timer.timeout.connect(self._poll_rdf_job)
+        self.rdf_last_update = 0 # Frames somados na última atualização do modo progressivo
+        self.rdf_previous_g = None
         
         self._create_widgets()
 
@@ -54,12 +51,20 @@ class AnalysisTab(QWidget):
         btn_load = QPushButton("Carregar Trajetória (dump.lammpstrj)")
         btn_load.clicked.connect(self._load_trajectory)
         top_toolbar.addWidget(btn_load)
+        self.use_cache_check = QCheckBox("Usar cache binário")
+        self.use_cache_check.setToolTip("Converte a trajetória para um cache binário (memmap) ao lado do arquivo.\nAberturas seguintes reutilizam o cache enquanto o arquivo não mudar.")
+        top_toolbar.addWidget(self.use_cache_check)
+        self.parallel_check = QCheckBox("Leitura paralela")
+        self.parallel_check.setToolTip("Lê o arquivo dump em vários processos, por faixas de bytes alinhadas aos frames.")
+        top_toolbar.addWidget(self.parallel_check)
         top_toolbar.addStretch()
+        self.parse_stats_label = QLabel("")
+        top_toolbar.addWidget(self.parse_stats_label)
         main_layout.addLayout(top_toolbar)
 
         # --- CORREÇÃO APLICADA AQUI: Widgets são criados antes de serem usados ---
-        self.rdf_canvas = MplCanvas(self, width=5, height=4, dpi=100)
-        self.msd_canvas = MplCanvas(self, width=5, height=4, dpi=100)
+        self.rdf_plot = FastPlot()
+        self.msd_plot = FastPlot()
         self.peak_table = QTableWidget(4, 2)
         # --- FIM DA CORREÇÃO ---
         
@@ -100,18 +105,53 @@ class AnalysisTab(QWidget):
         self.rdf_el2_combo.setEnabled(False)
         rdf_controls_layout.addWidget(self.rdf_el2_combo)
         
-        btn_calc_rdf = QPushButton("Calcular RDF")
-        btn_calc_rdf.clicked.connect(self._calculate_rdf)
-        rdf_controls_layout.addWidget(btn_calc_rdf)
+        self.rdf_all_pairs_check = QCheckBox("Todos os pares")
+        self.rdf_all_pairs_check.setToolTip("Calcula o g(r) de todos os pares de elementos e o total em uma única passagem.\nDepois, trocar o par apenas redesenha o gráfico.")
+        rdf_controls_layout.addWidget(self.rdf_all_pairs_check)
+        self.rdf_el1_combo.currentTextChanged.connect(self._on_rdf_pair_changed)
+        self.rdf_el2_combo.currentTextChanged.connect(self._on_rdf_pair_changed)
+
+        self.rdf_parallel_check = QCheckBox("Paralelo")
+        self.rdf_parallel_check.setToolTip("Distribui os frames entre vários processos, sem travar a interface.")
+        rdf_controls_layout.addWidget(self.rdf_parallel_check)
+
+        self.btn_calc_rdf = QPushButton("Calcular RDF")
+        self.btn_calc_rdf.clicked.connect(self._calculate_rdf)
+        rdf_controls_layout.addWidget(self.btn_calc_rdf)
         
         self.show_rdf_markers_check = QCheckBox("Mostrar Marcadores")
         self.show_rdf_markers_check.setChecked(True)
         self.show_rdf_markers_check.stateChanged.connect(self._draw_rdf_plot)
         rdf_controls_layout.addWidget(self.show_rdf_markers_check)
         rdf_controls_layout.addStretch()
+        rdf_controls_layout.addWidget(export_button(self.rdf_plot))
         
         plot_layout.addLayout(rdf_controls_layout)
-        plot_layout.addWidget(self.rdf_canvas)
+
+        rdf_progressive_layout = QHBoxLayout()
+        self.rdf_progressive_check = QCheckBox("Progressivo")
+        self.rdf_progressive_check.setToolTip("Usa todos os frames, redesenha o g(r) durante o cálculo e para sozinho\nquando a variação relativa entre atualizações fica abaixo da tolerância.")
+        rdf_progressive_layout.addWidget(self.rdf_progressive_check)
+        rdf_progressive_layout.addWidget(QLabel("Atualizar a cada:"))
+        self.rdf_update_spin = QSpinBox(); self.rdf_update_spin.setRange(1, 100000); self.rdf_update_spin.setValue(10); self.rdf_update_spin.setSuffix(" frames")
+        rdf_progressive_layout.addWidget(self.rdf_update_spin)
+        rdf_progressive_layout.addWidget(QLabel("Tolerância:"))
+        self.rdf_tolerance_spin = QDoubleSpinBox(); self.rdf_tolerance_spin.setDecimals(4); self.rdf_tolerance_spin.setRange(0.0, 1.0)
+        self.rdf_tolerance_spin.setSingleStep(0.001); self.rdf_tolerance_spin.setValue(0.005)
+        rdf_progressive_layout.addWidget(self.rdf_tolerance_spin)
+        rdf_progressive_layout.addStretch()
+        self.rdf_status_label = QLabel("")
+        rdf_progressive_layout.addWidget(self.rdf_status_label)
+        plot_layout.addLayout(rdf_progressive_layout)
+
+        rdf_progress_layout = QHBoxLayout()
+        self.rdf_progress_bar = QProgressBar(); self.rdf_progress_bar.setVisible(False); self.rdf_progress_bar.setTextVisible(True)
+        rdf_progress_layout.addWidget(self.rdf_progress_bar)
+        self.btn_cancel_rdf = QPushButton("Cancelar"); self.btn_cancel_rdf.setVisible(False)
+        self.btn_cancel_rdf.clicked.connect(self._cancel_rdf_job)
+        rdf_progress_layout.addWidget(self.btn_cancel_rdf)
+        plot_layout.addLayout(rdf_progress_layout)
+        plot_layout.addWidget(self.rdf_plot)
         
         results_frame = QFrame()
         results_layout = QVBoxLayout(results_frame)
@@ -144,146 +184,231 @@ class AnalysisTab(QWidget):
         self.msd_el_combo = QComboBox()
         self.msd_el_combo.setEnabled(False)
         msd_controls_layout.addWidget(self.msd_el_combo)
+        msd_controls_layout.addWidget(QLabel("Grandeza:"))
+        self.msd_quantity_combo = QComboBox()
+        self.msd_quantity_combo.addItems(CORRELATION_QUANTITIES)
+        msd_controls_layout.addWidget(self.msd_quantity_combo)
+        msd_controls_layout.addWidget(QLabel("Backend:"))
+        self.msd_backend_combo = QComboBox()
+        self.msd_backend_combo.addItems(MSD_BACKENDS)
+        self.msd_backend_combo.setToolTip("FFT: exato, com todas as origens de tempo, mas guarda a trajetória do elemento em memória.\nMulti-tau: correlador em streaming com memória fixa e lags espaçados em escala logarítmica.\nVACF e ACF de carga usam sempre o multi-tau.")
+        msd_controls_layout.addWidget(self.msd_backend_combo)
         
         btn_calc_msd = QPushButton("Calcular Difusão")
-        btn_calc_msd.clicked.connect(self._calculate_msd)
+        btn_calc_msd.clicked.connect(self._calculate_diffusion)
         msd_controls_layout.addWidget(btn_calc_msd)
+        msd_controls_layout.addWidget(export_button(self.msd_plot))
         msd_controls_layout.addStretch()
         self.msd_result_label = QLabel("<b>D = N/A</b>")
         msd_controls_layout.addWidget(self.msd_result_label)
         
         layout.addLayout(msd_controls_layout)
-        layout.addWidget(self.msd_canvas)
+        layout.addWidget(self.msd_plot)
         return panel
 
     # --- O resto do arquivo (lógica de backend) permanece o mesmo ---
     def _load_trajectory(self):
-        filepath, _ = QFileDialog.getOpenFileName(self, "Selecionar arquivo de trajetória", "", "LAMMPS Trajectory (*.lammpstrj);;All files (*.*)")
+        filepath, _ = QFileDialog.getOpenFileName(self, "Selecionar arquivo de trajetória", "", "LAMMPS Trajectory (*.lammpstrj *.lammpstrj.gz *.lammpstrj.zst);;All files (*.*)")
         if not filepath: return
         try:
-            self.frames, self.box_dims = self._parse_dump_file(filepath)
-            if not self.frames:
+            # O índice de frames é lido do arquivo auxiliar (ou construído uma única vez)
+            trajectory = DumpReader(filepath)
+            if self.use_cache_check.isChecked():
+                cache = TrajectoryCache.open(filepath)
+                if cache is None:
+                    cache = TrajectoryCache.convert(trajectory, workers=os.cpu_count() if self.parallel_check.isChecked() else None)
+                    self._show_parse_stats(trajectory)
+                trajectory = cache
+            if len(trajectory) == 0:
                 QMessageBox.critical(self, "Erro", "Nenhum frame válido encontrado no arquivo dump.")
                 return
-            first_frame_elements = [atom[1] for atom in self.frames[0]['atoms']]
-            self.unique_elements = sorted(list(set(first_frame_elements)))
+            self._cancel_rdf_job()
+            self.trajectory = trajectory
+            self.trajectory_path = filepath
+            self.element_names = trajectory.element_names
+            first_frame_codes = np.unique(trajectory.read_frame(0).elements)
+            self.unique_elements = sorted(self.element_names[code] for code in first_frame_codes)
+            self.partial_rdf = None
             
             self.rdf_el1_combo.clear()
-            self.rdf_el1_combo.addItems(self.unique_elements)
+            self.rdf_el1_combo.addItems(self.unique_elements + [TOTAL_RDF_LABEL])
             self.rdf_el1_combo.setEnabled(True)
             self.rdf_el2_combo.clear()
-            self.rdf_el2_combo.addItems(self.unique_elements)
+            self.rdf_el2_combo.addItems(self.unique_elements + [TOTAL_RDF_LABEL])
             self.rdf_el2_combo.setEnabled(True)
             self.msd_el_combo.clear()
             self.msd_el_combo.addItems(self.unique_elements)
             self.msd_el_combo.setEnabled(True)
             
-            QMessageBox.information(self, "Sucesso", f"{len(self.frames)} frames carregados com sucesso.")
+            QMessageBox.information(self, "Sucesso", f"{len(self.trajectory)} frames indexados com sucesso.")
         except Exception as e:
             QMessageBox.critical(self, "Erro ao Carregar Trajetória", f"Ocorreu um erro: {e}")
 
-    def _parse_dump_file(self, filepath):
-        frames = []; box_dims = []
-        with open(filepath, 'r') as f: lines = f.readlines()
-        i = 0
-        num_atoms = 0
-        while i < len(lines):
-            if lines[i].strip() == "ITEM: TIMESTEP":
-                frame_data = {'timestep': int(lines[i+1])}
-                i += 2
-            elif lines[i].strip() == "ITEM: NUMBER OF ATOMS":
-                num_atoms = int(lines[i+1])
-                i += 2
-            elif lines[i].strip() == "ITEM: BOX BOUNDS pp pp pp":
-                x_bounds = list(map(float, lines[i+1].split())); y_bounds = list(map(float, lines[i+2].split())); z_bounds = list(map(float, lines[i+3].split()))
-                box_dims.append([x_bounds[1]-x_bounds[0], y_bounds[1]-y_bounds[0], z_bounds[1]-z_bounds[0]])
-                i += 4
-            elif lines[i].strip().startswith("ITEM: ATOMS"):
-                headers = lines[i].strip().split()[2:]
-                id_idx, el_idx = headers.index('id'), headers.index('element')
-                x_idx, y_idx, z_idx = headers.index('x'), headers.index('y'), headers.index('z')
-                atoms = []
-                for j in range(num_atoms):
-                    parts = lines[i+1+j].strip().split()
-                    atoms.append([int(parts[id_idx]), parts[el_idx], float(parts[x_idx]), float(parts[y_idx]), float(parts[z_idx])])
-                atoms.sort(key=lambda x: x[0])
-                frame_data['atoms'] = atoms
-                frames.append(frame_data)
-                i += 1 + num_atoms
-            else:
-                i += 1
-        return frames, np.array(box_dims[0]) if box_dims else None
+    def _iter_all_frames(self):
+        """Todos os frames em ordem; usa o pool de processos quando a leitura paralela está ativa."""
+        if self.parallel_check.isChecked() and isinstance(self.trajectory, DumpReader):
+            yield from self.trajectory.iter_frames_parallel(os.cpu_count(), len(self.trajectory))
+            self._show_parse_stats(self.trajectory)
+        else:
+            yield from self.trajectory.iter_frames(range(len(self.trajectory)))
+
+    def _show_parse_stats(self, reader):
+        stats = getattr(reader, 'last_parse_stats', None)
+        if stats: self.parse_stats_label.setText(f"Leitura: {stats['frames_per_s']:.1f} frames/s | {stats['mb_per_s']:.1f} MB/s")
+
+    def _rdf_sampling(self):
+        """(rmax, nbins, frames amostrados) do cálculo de RDF."""
+        # r máximo limitado à metade da menor aresta de caixa ao longo da trajetória (imagem mínima)
+        box_bounds = self.trajectory.index['box_bounds']
+        rmax, nbins = float(np.min(box_bounds[:, :, 1] - box_bounds[:, :, 0])) / 2.0, 200
+        num_frames = len(self.trajectory)
+        num_frames_to_process = min(num_frames, 100)
+        frame_step = num_frames // num_frames_to_process if num_frames_to_process > 0 else 1
+        return rmax, nbins, range(0, num_frames, frame_step)
 
     def _calculate_rdf(self):
-        if not self.frames:
+        if self.trajectory is None:
             QMessageBox.critical(self, "Erro", "Carregue uma trajetória primeiro.")
             return
+        if self.rdf_job is not None: return
         el1, el2 = self.rdf_el1_combo.currentText(), self.rdf_el2_combo.currentText()
         if not el1 or not el2:
             QMessageBox.warning(self, "Aviso", "Selecione os dois elementos para o par.")
             return
-        rmax, nbins = min(self.box_dims) / 2.0, 200
-        dr = rmax / nbins
-        rdf_hist = np.zeros(nbins)
-        n_el1_total, n_el2_total, num_frames_processed = 0, 0, 0
-        
-        num_frames_to_process = min(len(self.frames), 100)
-        frame_step = len(self.frames) // num_frames_to_process if num_frames_to_process > 0 else 1
-        
-        for frame in self.frames[::frame_step]:
-            coords = np.array([atom[2:] for atom in frame['atoms']])
-            elements = np.array([atom[1] for atom in frame['atoms']])
-            indices1 = np.where(elements == el1)[0]
-            indices2 = np.where(elements == el2)[0]
+        # Todos os pares (ou o total) saem de uma única passagem guardada em PartialRDF
+        pair = None if self.rdf_all_pairs_check.isChecked() or TOTAL_RDF_LABEL in (el1, el2) else (el1, el2)
+        rmax, nbins, frame_indices = self._rdf_sampling()
+        progressive = self.rdf_progressive_check.isChecked()
+        batch_frames = self.rdf_update_spin.value()
+        if progressive:
+            # Todos os frames, em blocos espaçados ao longo da trajetória
+            frame_indices = interleaved_frame_order(len(self.trajectory), batch_frames)
+        self.rdf_status_label.setText("")
+
+        # Trajetórias comprimidas (.gz/.zst) não têm acesso aleatório: cada processo teria de
+        # descomprimir o arquivo desde o início, então o cálculo fica no próprio processo
+        compressed = getattr(self.trajectory, 'compression', None)
+        if self.rdf_parallel_check.isChecked() and not compressed:
+            num_chunks = -(-len(frame_indices) // batch_frames) if progressive else None
+            try:
+                job = ParallelRDF(self.trajectory, self.trajectory_path, pair, rmax, nbins, frame_indices, num_chunks=num_chunks)
+            except Exception as e:
+                QMessageBox.critical(self, "Erro", f"Não foi possível iniciar o cálculo paralelo: {e}")
+                return
+            self._start_rdf_job(job, interval=200)
+            return
+        if progressive or compressed:
+            self._start_rdf_job(SerialRDF(self.trajectory, pair, rmax, nbins, frame_indices, batch_frames), interval=0)
+            return
 
-            if len(indices1) == 0 or len(indices2) == 0: continue
-            
-            tree = cKDTree(coords[indices2])
-            dist_matrix = tree.query_ball_point(coords[indices1], r=rmax)
-
-            for i, neighbors_indices in enumerate(dist_matrix):
-                if not neighbors_indices: continue
-                ref_pos = coords[indices1[i]]
-                dists = np.linalg.norm(coords[indices2[neighbors_indices]] - ref_pos, axis=1)
-                if el1 == el2:
-                    dists = dists[dists > 1e-6] 
-                if dists.size > 0:
-                    hist, _ = np.histogram(dists, bins=nbins, range=(0, rmax))
-                    rdf_hist += hist
-            
-            n_el1_total += len(indices1)
-            n_el2_total += len(indices2)
-            num_frames_processed += 1
+        accumulator = make_rdf_accumulator(self.trajectory, pair, rmax, nbins)
+        # Acesso direto aos frames amostrados pelo índice de offsets, sem ler o arquivo inteiro
+        for frame in self.trajectory.iter_frames(frame_indices):
+            accumulator.add_frame(frame)
+        self._finish_rdf(accumulator)
 
-        if num_frames_processed == 0:
+    def _finish_rdf(self, accumulator):
+        if not self._show_rdf_result(accumulator):
             QMessageBox.critical(self, "Erro", "Nenhum par de elementos encontrado.")
+
+    def _show_rdf_result(self, accumulator):
+        """Atualiza `rdf_data` e o gráfico a partir do acumulador. Retorna False se não há dados."""
+        if isinstance(accumulator, PartialRDF):
+            self.partial_rdf = accumulator
+            self._show_partial_rdf()
+            return True
+        result = accumulator.result()
+        if result is None: return False
+        r, g_r, rdf_hist, avg_n_el1 = result
+        el1, el2 = self.element_names[accumulator.code1], self.element_names[accumulator.code2]
+        self.rdf_data = {'r': r, 'g_r': g_r, 'rdf_hist': rdf_hist, 'avg_n_el1': avg_n_el1, 'num_frames': accumulator.num_frames, 'pair': f"{el1}-{el2}"}
+        self._draw_rdf_plot()
+        return True
+
+    def _start_rdf_job(self, job, interval):
+        self.rdf_job = job
+        self.rdf_last_update = 0
+        self.rdf_previous_g = None
+        self.btn_calc_rdf.setEnabled(False)
+        self.rdf_progress_bar.setRange(0, job.total_frames); self.rdf_progress_bar.setValue(0)
+        self.rdf_progress_bar.setVisible(True); self.btn_cancel_rdf.setVisible(True)
+        self.rdf_job_timer.setInterval(interval)
+        self.rdf_job_timer.start()
+
+    def _poll_rdf_job(self):
+        job = self.rdf_job
+        if job is None: return
+        try:
+            finished = job.poll()
+        except Exception as e:
+            self._cancel_rdf_job()
+            QMessageBox.critical(self, "Erro no Cálculo de RDF", f"Ocorreu um erro: {e}")
             return
-        
-        r = np.linspace(0, rmax, nbins)
-        shell_volume = 4.0 * np.pi * (r + dr/2)**2 * dr
-        volume = self.box_dims[0] * self.box_dims[1] * self.box_dims[2]
-        avg_n_el1 = n_el1_total / num_frames_processed
-        avg_n_el2 = n_el2_total / num_frames_processed
-        bulk_density = avg_n_el2 / volume
-        if el1 == el2:
-            bulk_density = (avg_n_el1 - 1) / volume
-        
-        norm_factor = bulk_density * avg_n_el1 * num_frames_processed
-        g_r = rdf_hist / (shell_volume + 1e-9) / (norm_factor + 1e-9)
-        
-        self.rdf_data = {'r': r, 'g_r': g_r, 'rdf_hist': rdf_hist, 'avg_n_el1': avg_n_el1, 'num_frames': num_frames_processed, 'pair': f"{el1}-{el2}"}
+        self.rdf_progress_bar.setValue(job.frames_done)
+        if self.rdf_progressive_check.isChecked() and job.frames_merged > self.rdf_last_update:
+            if finished or job.frames_merged - self.rdf_last_update >= self.rdf_update_spin.value():
+                if self._update_progressive_rdf(job): finished = True
+        if finished:
+            self._end_rdf_job()
+            self._finish_rdf(job.result)
+
+    def _update_progressive_rdf(self, job):
+        """Redesenha a estimativa parcial e verifica a convergência. Retorna True ao convergir."""
+        self.rdf_last_update = job.frames_merged
+        if not self._show_rdf_result(job.result) or not self.rdf_data: return False
+        g_r, previous_g = self.rdf_data['g_r'], self.rdf_previous_g
+        self.rdf_previous_g = g_r.copy()
+        if previous_g is None or previous_g.shape != g_r.shape:
+            self.rdf_status_label.setText(f"Frames: {job.frames_merged}/{job.total_frames}")
+            return False
+        change = rdf_change(previous_g, g_r)
+        converged = change < self.rdf_tolerance_spin.value()
+        status = "Convergiu" if converged else "Frames"
+        self.rdf_status_label.setText(f"{status}: {job.frames_merged}/{job.total_frames} | Δg(r) = {change:.2e}")
+        if converged: job.cancel()
+        return converged
+
+    def _cancel_rdf_job(self):
+        if self.rdf_job is None: return
+        self.rdf_job.cancel()
+        self._end_rdf_job()
+
+    def _end_rdf_job(self):
+        self.rdf_job = None
+        self.rdf_job_timer.stop()
+        self.btn_calc_rdf.setEnabled(True)
+        self.rdf_progress_bar.setVisible(False); self.btn_cancel_rdf.setVisible(False)
+
+    def _on_rdf_pair_changed(self):
+        if self.partial_rdf is not None: self._show_partial_rdf()
+
+    def _show_partial_rdf(self):
+        """Monta `rdf_data` a partir dos histogramas guardados para o par selecionado."""
+        el1, el2 = self.rdf_el1_combo.currentText(), self.rdf_el2_combo.currentText()
+        if not el1 or not el2: return
+        if TOTAL_RDF_LABEL in (el1, el2):
+            result, pair = self.partial_rdf.total(), TOTAL_RDF_LABEL
+        else:
+            result = self.partial_rdf.pair(self.trajectory.element_code(el1), self.trajectory.element_code(el2))
+            pair = f"{el1}-{el2}"
+        if result is None:
+            self.rdf_data = {}
+        else:
+            r, g_r, rdf_hist, avg_n_el1 = result
+            self.rdf_data = {'r': r, 'g_r': g_r, 'rdf_hist': rdf_hist, 'avg_n_el1': avg_n_el1, 'num_frames': self.partial_rdf.num_frames, 'pair': pair}
         self._draw_rdf_plot()
 
     def _draw_rdf_plot(self):
-        self.rdf_canvas._style_plot("Função de Distribuição Radial (RDF)", "Distância, r (Å)", "g(r)")
+        self.rdf_plot.set_labels("Função de Distribuição Radial (RDF)", "Distância, r (Å)", "g(r)")
+        peak_positions = []
         
         for row in range(self.peak_table.rowCount()):
             self.peak_table.setItem(row, 1, QTableWidgetItem("N/A"))
 
         if self.rdf_data:
             r, g_r = self.rdf_data['r'], self.rdf_data['g_r']
-            self.rdf_canvas.axes.set_title(f"RDF: {self.rdf_data['pair']}", color="#e0e0e0", weight='bold')
-            self.rdf_canvas.axes.plot(r, g_r, color="#3498DB")
+            self.rdf_plot.plot_item.setTitle(f"RDF: {self.rdf_data['pair']}")
+            self.rdf_plot.set_curve('g_r', r, g_r, pen=pg.mkPen("#3498DB", width=1.5))
             
             if self.show_rdf_markers_check.isChecked():
                 rdf_hist, avg_n_el1, num_frames = self.rdf_data['rdf_hist'], self.rdf_data['avg_n_el1'], self.rdf_data['num_frames']
@@ -293,7 +418,7 @@ class AnalysisTab(QWidget):
                 if len(peaks) > 0:
                     peak1_r = r[peaks[0]]
                     self.peak_table.setItem(0, 1, QTableWidgetItem(f"{peak1_r:.2f} Å"))
-                    self.rdf_canvas.axes.axvline(peak1_r, color='yellow', linestyle='--', alpha=0.7)
+                    peak_positions.append(peak1_r)
                     minima_after_peak1 = minima[minima > peaks[0]]
                     if len(minima_after_peak1) > 0:
                         min1_idx = minima_after_peak1[0]
@@ -303,19 +428,24 @@ class AnalysisTab(QWidget):
                 if len(peaks) > 1:
                     peak2_r = r[peaks[1]]
                     self.peak_table.setItem(2, 1, QTableWidgetItem(f"{peak2_r:.2f} Å"))
-                    self.rdf_canvas.axes.axvline(peak2_r, color='yellow', linestyle='--', alpha=0.7)
+                    peak_positions.append(peak2_r)
                     minima_after_peak2 = minima[minima > peaks[1]]
                     if len(minima_after_peak2) > 0:
                         min2_idx = minima_after_peak2[0]
                         cn2 = np.sum(rdf_hist[:min2_idx]) / (avg_n_el1 * num_frames)
                         self.peak_table.setItem(3, 1, QTableWidgetItem(f"{cn2:.2f}"))
         else:
-            self.rdf_canvas.axes.text(0.5, 0.5, 'Calcule o RDF para visualizar', ha='center', va='center', transform=self.rdf_canvas.axes.transAxes, color='gray')
-        
-        self.rdf_canvas.draw()
+            self.rdf_plot.show_placeholder('Calcule o RDF para visualizar')
+        self.rdf_plot.set_lines('peaks', peak_positions, pen=dashed_pen((255, 255, 0, 180)))
         
+    def _calculate_diffusion(self):
+        if self.msd_quantity_combo.currentText() == "MSD" and self.msd_backend_combo.currentIndex() == 0:
+            self._calculate_msd()
+        else:
+            self._calculate_correlation()
+
     def _calculate_msd(self):
-        if not self.frames:
+        if self.trajectory is None:
             QMessageBox.critical(self, "Erro", "Carregue uma trajetória primeiro.")
             return
         element = self.msd_el_combo.currentText()
@@ -323,38 +453,44 @@ class AnalysisTab(QWidget):
             QMessageBox.warning(self, "Aviso", "Selecione um elemento para o cálculo do MSD.")
             return
 
-        initial_ids = {atom[0] for atom in self.frames[0]['atoms'] if atom[1] == element}
-        if not initial_ids:
+        first_frame = self.trajectory.read_frame(0)
+        id_list = first_frame.ids[first_frame.indices_of(first_frame.element_code(element))]
+        if id_list.size == 0:
             QMessageBox.critical(self, "Erro", f"Nenhum átomo do elemento '{element}' encontrado no primeiro frame.")
             return
         
-        id_list = sorted(list(initial_ids))
-        id_map = {p_id: i for i, p_id in enumerate(id_list)}
+        num_frames = len(self.trajectory)
+        positions = np.zeros((num_frames, len(id_list), 3))
+        timesteps = np.zeros(num_frames)
+        boxes = np.zeros((num_frames, 3))
+        images = np.zeros((num_frames, len(id_list), 3), dtype=np.int32) if first_frame.images is not None else None
         
-        positions = np.zeros((len(self.frames), len(id_list), 3))
-        timesteps = np.zeros(len(self.frames))
-        
-        for i, frame in enumerate(self.frames):
-            timesteps[i] = frame['timestep']
-            frame_atoms = {atom[0]: np.array(atom[2:]) for atom in frame['atoms'] if atom[0] in initial_ids}
-            for p_id, pos in frame_atoms.items():
-                positions[i, id_map[p_id]] = pos
+        # _iter_all_frames lê só os frames indexados; esgotá-lo mostra a vazão da leitura paralela
+        for i, frame in enumerate(self._iter_all_frames()):
+            if frame.box is None:
+                QMessageBox.critical(self, "Erro", f"O frame do timestep {frame.timestep} não tem 'BOX BOUNDS'.")
+                return
+            timesteps[i] = frame.timestep
+            boxes[i] = frame.box
+            # ids já vêm ordenados do leitor: busca binária em vez de dicionário por átomo
+            pos = np.minimum(np.searchsorted(frame.ids, id_list), len(frame.ids) - 1)
+            found = frame.ids[pos] == id_list
+            positions[i, found] = frame.coords[pos[found]]
+            if images is not None and frame.images is not None: images[i, found] = frame.images[pos[found]]
         
-        for t in range(1, len(positions)):
-            displacement = positions[t] - positions[t - 1]
-            displacement -= self.box_dims * np.round(displacement / self.box_dims)
-            positions[t] = positions[t - 1] + displacement
+        # Caixa de cada frame (NPT) e flags de imagem quando o dump as tiver; xu/yu/zu já vêm desdobradas
+        if not first_frame.unwrapped:
+            positions = unwrap_positions(positions, boxes, images)
 
-        msd = np.zeros(len(self.frames))
-        for t in range(1, len(self.frames)):
-            diff = positions[t:] - positions[:-t]
-            msd[t] = np.mean(np.sum(diff**2, axis=2))
+        # Todas as origens de tempo em O(T log T), em vez de um laço sobre os lags
+        msd = msd_fft(positions)
 
-        dt = 0.25 # ASSUMIDO! O ideal é pegar isso do script de input
-        time_ps = (timesteps - timesteps[0]) * dt * 1e-3
+        time_ps = (timesteps - timesteps[0]) * TIMESTEP_FS * 1e-3
+        self._fit_diffusion(time_ps, msd, len(time_ps) // 2, element)
 
-        fit_start_index = len(time_ps) // 2
-        if fit_start_index < 2:
+    def _fit_diffusion(self, time_ps, msd, fit_start_index, element):
+        """Ajuste linear do MSD a partir de `fit_start_index`: D = inclinação / 6."""
+        if fit_start_index < 2 or len(time_ps) - fit_start_index < 2:
             QMessageBox.critical(self, "Erro", "Não há pontos suficientes para o ajuste linear do MSD.")
             return
 
@@ -365,19 +501,77 @@ class AnalysisTab(QWidget):
 
         self.msd_result_label.setText(f"<b>D = {diffusion_coeff_cm2_s:.3e} cm²/s</b>")
         self._draw_msd_plot(time_ps, msd, time_ps[fit_start_index:], intercept + slope * time_ps[fit_start_index:], element, r_value**2)
+
+    def _calculate_correlation(self):
+        """MSD, VACF ou autocorrelação de carga com o correlador multi-tau, frame a frame."""
+        if self.trajectory is None:
+            QMessageBox.critical(self, "Erro", "Carregue uma trajetória primeiro.")
+            return
+        element = self.msd_el_combo.currentText()
+        if not element:
+            QMessageBox.warning(self, "Aviso", "Selecione um elemento para o cálculo.")
+            return
+        quantity = self.msd_quantity_combo.currentText()
+
+        first_frame = self.trajectory.read_frame(0)
+        id_list = first_frame.ids[first_frame.indices_of(first_frame.element_code(element))]
+        if id_list.size == 0:
+            QMessageBox.critical(self, "Erro", f"Nenhum átomo do elemento '{element}' encontrado no primeiro frame.")
+            return
+        column = {'MSD': 'coords', 'VACF': 'velocities', 'ACF de carga': 'charges'}[quantity]
+        if getattr(first_frame, column) is None:
+            missing = {'velocities': "vx vy vz", 'charges': "q"}[column]
+            QMessageBox.critical(self, "Erro", f"O arquivo dump não contém as colunas '{missing}' necessárias para {quantity}.")
+            return
+        if len(self.trajectory) < 2:
+            QMessageBox.critical(self, "Erro", "São necessários pelo menos dois frames.")
+            return
+
+        correlator = MultiTauCorrelator(mode='displacement' if quantity == "MSD" else 'product')
+        unwrapper = PositionUnwrapper()
+        # Átomos ausentes em um frame mantêm o último valor conhecido
+        values = np.zeros((len(id_list),) + getattr(first_frame, column).shape[1:])
+        images = np.zeros((len(id_list), 3), dtype=np.int32) if first_frame.images is not None else None
+        for frame in self._iter_all_frames():
+            pos = np.minimum(np.searchsorted(frame.ids, id_list), len(frame.ids) - 1)
+            found = frame.ids[pos] == id_list
+            values[found] = getattr(frame, column)[pos[found]]
+            if quantity == "MSD" and not frame.unwrapped:
+                if frame.box is None:
+                    QMessageBox.critical(self, "Erro", f"O frame do timestep {frame.timestep} não tem 'BOX BOUNDS'.")
+                    return
+                if images is not None and frame.images is not None: images[found] = frame.images[pos[found]]
+                correlator.add(unwrapper.update(values, frame.box, images))
+            else:
+                correlator.add(values)
+
+        frame_interval = float(self.trajectory.index['timesteps'][1] - self.trajectory.index['timesteps'][0])
+        lags, correlation = correlator.result()
+        time_ps = lags * frame_interval * TIMESTEP_FS * 1e-3
+        if quantity == "MSD":
+            self._fit_diffusion(time_ps, correlation, int(np.searchsorted(time_ps, time_ps[-1] / 2)), element)
+        elif quantity == "VACF":
+            # Green-Kubo: D = 1/3 ∫ <v(0)·v(t)> dt; velocidades em Å/fs (unidades 'real'), 1 Å²/fs = 0.1 cm²/s
+            diffusion_coeff_cm2_s = trapezoid(correlation, time_ps * 1e3) / 3.0 * 0.1
+            self.msd_result_label.setText(f"<b>D (Green-Kubo) = {diffusion_coeff_cm2_s:.3e} cm²/s</b>")
+            self._draw_correlation_plot(time_ps, correlation, f"VACF para {element}", "<v(0)·v(t)> (Å²/fs²)")
+        else:
+            self.msd_result_label.setText(f"<b><q²> = {correlation[0]:.4f} e²</b>")
+            self._draw_correlation_plot(time_ps, correlation, f"Autocorrelação de carga para {element}", "<q(0)q(t)> (e²)")
+
+    def _draw_correlation_plot(self, time_data, values, title, ylabel):
+        self.msd_plot.set_labels(title, "Tempo (ps)", ylabel)
+        self.msd_plot.remove_curves(keep=('data',))
+        self.msd_plot.set_curve('data', time_data, values, pen=pg.mkPen("#2ecc71", width=1.5), symbol='o', symbol_size=4, symbol_brush="#2ecc71")
+        self.msd_plot.set_lines('zero', [0.0], angle=0, pen=pg.mkPen("#777", width=0.8))
         
     def _draw_msd_plot(self, time_data=None, msd_data=None, fit_time=None, fit_msd=None, element=None, r2=None):
-        self.msd_canvas._style_plot("Deslocamento Quadrático Médio (MSD)", "Tempo (ps)", "MSD (Å²)")
+        self.msd_plot.set_labels("Deslocamento Quadrático Médio (MSD)", "Tempo (ps)", "MSD (Å²)")
+        self.msd_plot.set_lines('zero', [])
         
         if msd_data is not None:
-            self.msd_canvas.axes.set_title(f"MSD para {element}", color="#e0e0e0", weight='bold')
-            self.msd_canvas.axes.plot(time_data, msd_data, color="#2ecc71", label="MSD Calculado")
-            self.msd_canvas.axes.plot(fit_time, fit_msd, '--', color="#e74c3c", label=f"Ajuste Linear (R²={r2:.4f})")
-            legend = self.msd_canvas.axes.legend()
-            legend.get_frame().set_facecolor("#2c2e3a")
-            legend.get_frame().set_edgecolor("#555")
-            for text in legend.get_texts(): text.set_color("white")
+            self.msd_plot.plot_item.setTitle(f"MSD para {element}")
+            self.msd_plot.set_curve('data', time_data, msd_data, name="MSD Calculado", pen=pg.mkPen("#2ecc71", width=1.5))
+            self.msd_plot.set_curve('fit', fit_time, fit_msd, name=f"Ajuste Linear (R²={r2:.4f})", pen=dashed_pen("#e74c3c"))
         else:
-            self.msd_canvas.axes.text(0.5, 0.5, 'Calcule a Difusão para visualizar', ha='center', va='center', transform=self.msd_canvas.axes.transAxes, color='gray')
-        
-        self.msd_canvas.draw()
\ No newline at end of file
+            self.msd_plot.show_placeholder('Calcule a Difusão para visualizar')
\ No newline at end of file
@@ -76,9 +76,11 @@ class AnalysisHubTab(QWidget):
         
         self.nav_list.currentRowChanged.connect(self.stacked_widget.setCurrentIndex)
         
+        self.species_tab = SpeciesAnalysisTab()
+        self.thermo_tab = ThermoAnalysisTab()
         self.tab_info = [
-            (SpeciesAnalysisTab(), "Análise de Espécies", "fa5s.flask"),
-            (ThermoAnalysisTab(), "Análise Termodinâmica", "fa5s.chart-line"),
+            (self.species_tab, "Análise de Espécies", "fa5s.flask"),
+            (self.thermo_tab, "Análise Termodinâmica", "fa5s.chart-line"),
             (KineticAnalysisTab(), "Análise Cinética", "fa5s.hourglass-half"),
             (AnalysisTab(), "Estrutura e Transporte", "fa5s.sitemap")
         ]
@@ -86,6 +88,12 @@ class AnalysisHubTab(QWidget):
         self.nav_list.setCurrentRow(0)
         self.update_theme('dark')
 
+    def on_simulation_started(self, working_directory, script_path):
+        self.species_tab.follow_simulation(working_directory, script_path)
+
+    def on_thermo_updated(self, buffer):
+        self.thermo_tab.update_live(buffer)
+
     def _add_analysis_tab(self, widget, label, icon_name, icon_color):
         icon = qta.icon(icon_name, color=icon_color)
         item = QListWidgetItem(icon, label)
@@ -16,13 +16,8 @@ import pyqtgraph as pg
 import pyqtgraph.opengl as gl
 import qtawesome as qta
 
-try:
-    import xyz2graph
-    XYZ2GRAPH_AVAILABLE = True
-except ImportError:
-    XYZ2GRAPH_AVAILABLE = False
-
 from tab_viewer import ATOM_COLORS, ATOM_RADII
+from bond_engine import element_codes, find_bonds
 
 class SystemBuilderTab(QWidget):
     # __init__ e outras funções permanecem iguais...
@@ -143,12 +138,9 @@ class SystemBuilderTab(QWidget):
     def _zoom_camera(self, factor):
         self.viewer.setCameraPosition(distance=self.viewer.opts['distance'] * factor)
 
-    def _find_bonds(self, coords, symbols):
-        bonds = []; kdtree = cKDTree(coords); pairs = kdtree.query_pairs(r=2.2)
-        for i, j in pairs:
-            r_i = ATOM_RADII.get(symbols[i], 0.7); r_j = ATOM_RADII.get(symbols[j], 0.7); max_dist = (r_i + r_j) * 1.2
-            if np.linalg.norm(coords[i] - coords[j]) <= max_dist: bonds.append((i, j))
-        return bonds
+    def _find_bonds(self, coords, symbols, box=None):
+        element_names, codes = element_codes(symbols)
+        return find_bonds(coords, codes, element_names, box_bounds=box)
 
     def _draw_generated_system(self, style='avogadro'):
         if not self.generated_system: return
@@ -171,13 +163,14 @@ class SystemBuilderTab(QWidget):
             self.viewer.addItem(spheres)
 
         try:
-            bonds = self._find_bonds(coords, symbols)
-            if bonds:
-                bond_positions = []
-                [bond_positions.extend([coords[s], coords[e]]) for s, e in bonds]
-                if bond_positions:
-                    bond_lines = gl.GLLinePlotItem(pos=np.array(bond_positions), color=(0.7, 0.7, 0.7, 1.0), width=3, mode='lines', glOptions='opaque')
-                    self.viewer.addItem(bond_lines)
+            box = np.asarray(self.generated_system['box'], dtype=float)
+            bonds = self._find_bonds(coords, symbols, box)
+            # Ligações entre imagens periódicas atravessariam a caixa no desenho: só as diretas são desenhadas
+            bonds = bonds[np.all(np.abs(coords[bonds[:, 1]] - coords[bonds[:, 0]]) < box / 2, axis=1)]
+            if len(bonds):
+                bond_positions = coords[bonds].reshape(-1, 3)
+                bond_lines = gl.GLLinePlotItem(pos=bond_positions, color=(0.7, 0.7, 0.7, 1.0), width=3, mode='lines', glOptions='opaque')
+                self.viewer.addItem(bond_lines)
         except Exception as e:
             self._log(f"Aviso: Falha na detecção de ligações: {e}")
 
@@ -5,10 +5,13 @@ import re
 from PyQt6.QtWidgets import (QWidget, QHBoxLayout, QVBoxLayout, QGridLayout, QPushButton,
                              QLineEdit, QComboBox, QCheckBox, QPlainTextEdit, QFileDialog,
                              QMessageBox, QLabel, QFrame, QTabWidget, QProgressBar, QSpinBox)
-from PyQt6.QtCore import QProcess, QTimer
+from PyQt6.QtCore import QProcess, QTimer, pyqtSignal
 from PyQt6.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor, QFont
 
 import psutil
+
+from thermo_parser import ThermoLogParser
+
 try:
     import pynvml
     PYNVML_AVAILABLE = True
@@ -46,6 +49,9 @@ if PYGMENTS_AVAILABLE:
                     start_index = start + len(token_text)
 
 class InputGeneratorTab(QWidget):
+    simulation_started = pyqtSignal(str, str) # (diretório de trabalho, script de input)
+    thermo_updated = pyqtSignal(object) # ThermoBuffer com o thermo lido do stdout até agora
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.vars = {}
@@ -53,6 +59,7 @@ class InputGeneratorTab(QWidget):
         self.project_dir = os.getcwd()
         self.script_path = None
         self.process = None
+        self.thermo_parser = None
         self.total_steps = 0
         self.nvml_handle = None
         if PYNVML_AVAILABLE:
@@ -86,6 +93,7 @@ class InputGeneratorTab(QWidget):
         settings_layout.addLayout(grid_layout)
         self.dump_check = self._add_check(settings_layout, "dump_traj", "Gerar dump.lammpstrj?", True)
         self.species_check = self._add_check(settings_layout, "species_log", "Gerar species.log?", True)
+        self.bonds_check = self._add_check(settings_layout, "reaxff_bonds", "Gerar bonds.reaxff (ordens de ligação)?", False)
         settings_layout.addStretch()
         btn_generate = QPushButton("Gerar/Atualizar Script"); btn_generate.clicked.connect(self._generate_script)
         settings_layout.addWidget(btn_generate)
@@ -137,8 +145,9 @@ class InputGeneratorTab(QWidget):
         v = {key: var.text() if isinstance(var, QLineEdit) else var.currentText() if isinstance(var, QComboBox) else var.isChecked() if isinstance(var, QCheckBox) else var.value() for key, var in self.vars.items()}
         elements_str = "H O C"
         script_content = f"""# SCRIPT DE INPUT GERADO PELO ANALISADOR MULTIFUNCIONAL\n\n# ---- Configurações Iniciais ----\nunits           real\natom_style      charge\nboundary        {v['boundary']}\n\n# ---- Leitura do Sistema e Campo de Força ----\nread_data       {os.path.basename(self.data_filename_path)}\npair_style      reaxff NULL checkqeq yes\npair_coeff      * * {v['force_field_file']} {elements_str}\n\n# ---- Configurações de Vizinhança e Termodinâmica ----\nneighbor        2.5 bin\nneigh_modify    every 1 delay 0 check yes\nfix             qeq all qeq/reaxff 1 0.0 10.0 1.0e-6 reaxff\nthermo_style    custom step temp press vol density pe ke etotal enthalpy\nthermo_modify   line yaml\nthermo          1000\n\n# ---- Minimização de Energia ----\nminimize        1.0e-4 1.0e-6 1000 10000\n\n# ---- Dinâmica Molecular ----\nreset_timestep  0\ntimestep        {v['timestep']}\nvelocity        all create {v['temp_start']} 4928459 dist gaussian\n\n# ---- Saídas (Dumps) ----\n"""
-        if v.get('dump_traj', False): script_content += f"dump            dmp all custom 1000 dump.lammpstrj id type element q x y z\ndump_modify     dmp element {elements_str}\n"
+        if v.get('dump_traj', False): script_content += f"dump            dmp all custom 1000 dump.lammpstrj id type element q x y z ix iy iz vx vy vz\ndump_modify     dmp element {elements_str}\n"
         if v.get('species_log', False): script_content += f"fix             spec all reaxff/species 1 1000 1000 species.log element {elements_str}\n"
+        if v.get('reaxff_bonds', False): script_content += "fix             bonds all reaxff/bonds 1000 bonds.reaxff\n"
         script_content += "\n# ---- Ensemble e Execução ----\n"
         if v['ensemble'] == 'nvt': script_content += f"fix             1 all nvt temp {v['temp_start']} {v['temp_end']} {v['temp_damp']}\n"
         elif v['ensemble'] == 'npt': script_content += f"fix             1 all npt temp {v['temp_start']} {v['temp_end']} {v['temp_damp']} iso {v['press_start']} {v['press_end']} {v['press_damp']}\n"
@@ -178,16 +187,24 @@ class InputGeneratorTab(QWidget):
         else: program = lmp_path; args = ["-in", script_filename]
         self.progress_bar.setValue(0); self.progress_bar.setFormat("Iniciando..."); self.progress_bar.setVisible(True); self.monitor_timer.start(); self._update_monitors()
         self.process = QProcess(); self.process.setProcessChannelMode(QProcess.ProcessChannelMode.MergedChannels)
+        self.thermo_parser = ThermoLogParser()
         self.process.readyReadStandardOutput.connect(self._on_ready_read); self.process.finished.connect(self._on_finished)
         self.log_text.clear(); self._log(f"Diretório de Trabalho: {working_directory}\n"); self._log(f"Executando comando: {program} {' '.join(args)}\n\n")
         self.process.setWorkingDirectory(working_directory); self.process.start(program, args)
         self.run_button.setEnabled(False); self.stop_button.setEnabled(True); self.output_tab_view.setCurrentIndex(0)
+        self.simulation_started.emit(working_directory, self.script_path)
 
     def _on_ready_read(self):
         if not self.process: return
-        output = self.process.readAllStandardOutput().data().decode('utf-8', errors='ignore')
+        data = self.process.readAllStandardOutput().data()
+        output = data.decode('utf-8', errors='ignore')
         self._log(output)
+        # Linhas do thermo vão direto para colunas numpy, sem reler o log
         last_step = -1
+        if self.thermo_parser.feed(data):
+            self.thermo_updated.emit(self.thermo_parser.buffer)
+            step = self.thermo_parser.buffer.last('Step')
+            if step >= 0: last_step = int(step) # Também cobre o formato yaml ('- [passo, ...]')
         for line in output.strip().split('\n'):
             parts = line.strip().split()
             if parts and parts[0].isdigit():
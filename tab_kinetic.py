@@ -5,36 +5,12 @@ from scipy.stats import linregress
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QComboBox, 
                              QRadioButton, QFileDialog, QMessageBox, QFrame,
                              QLabel, QTableWidget, QTableWidgetItem, QHeaderView,
-                             QSplitter, QInputDialog)
+                             QSplitter, QInputDialog, QDoubleSpinBox, QLineEdit)
 from PyQt6.QtCore import Qt
 
-import matplotlib
-matplotlib.use('Qt5Agg')
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-
-def _preprocess_log_file(log_file):
-    # Lógica idêntica à original
-    if not os.path.exists(log_file): return ('error', f"Arquivo não encontrado: {log_file}")
-    all_data = {}; i = 0
-    try:
-        with open(log_file, 'r') as f: lines = f.readlines()
-    except Exception as e: return ('error', f"Não foi possível ler o arquivo: {e}")
-    while i < len(lines):
-        line = lines[i].strip()
-        if line.startswith('#'):
-            if i + 1 < len(lines):
-                data_line = lines[i+1].strip(); data_parts = data_line.split()
-                if data_parts and data_parts[0].isdigit():
-                    current_timestep = int(data_parts[0])
-                    header_parts = line.lstrip('# ').split()
-                    species_names = header_parts[3:]
-                    species_counts = [int(count) for count in data_parts[3:]]
-                    all_data[current_timestep] = dict(zip(species_names, species_counts))
-            i += 2
-        else: i += 1
-    if not all_data: return ('error', "Nenhum dado de espécies válido encontrado no arquivo.")
-    return ('success', all_data)
+from reaxff_bonds import ReaxFFBonds, DEFAULT_BOND_ORDER_CUTOFF, is_reaxff_bonds_file
+from species_log import SpeciesTable, load_species_log
+from plot_widgets import FastPlot, dashed_pen, export_button
 
 
 class KineticAnalysisTab(QWidget):
@@ -63,6 +39,21 @@ class KineticAnalysisTab(QWidget):
         left_layout.addWidget(btn_add)
         left_layout.addWidget(btn_remove)
 
+        # Experimentos com arquivo do fix reaxff/bonds: espécies recalculadas com este corte de ordem de ligação
+        bonds_layout = QHBoxLayout()
+        bonds_layout.addWidget(QLabel("Corte BO (bonds ReaxFF):"))
+        self.bond_cutoff_spin = QDoubleSpinBox()
+        self.bond_cutoff_spin.setRange(0.01, 3.0)
+        self.bond_cutoff_spin.setSingleStep(0.05)
+        self.bond_cutoff_spin.setValue(DEFAULT_BOND_ORDER_CUTOFF)
+        self.bond_cutoff_spin.editingFinished.connect(self._update_bonds_experiments)
+        bonds_layout.addWidget(self.bond_cutoff_spin)
+        bonds_layout.addWidget(QLabel("Elementos por tipo:"))
+        self.bond_types_entry = QLineEdit("H O C")
+        self.bond_types_entry.editingFinished.connect(self._update_bonds_experiments)
+        bonds_layout.addWidget(self.bond_types_entry)
+        left_layout.addLayout(bonds_layout)
+
         self.exp_table = QTableWidget()
         self.exp_table.setColumnCount(2)
         self.exp_table.setHorizontalHeaderLabels(['Arquivo', 'Temperatura (K)'])
@@ -109,10 +100,13 @@ class KineticAnalysisTab(QWidget):
         right_panel.setObjectName("Card")
         right_layout = QVBoxLayout(right_panel)
         
-        right_layout.addWidget(QLabel("<b>Gráfico de Arrhenius (ln(k) vs 1/T)</b>"))
-        self.canvas = FigureCanvas(Figure(figsize=(5, 4), facecolor="#2c2e3a"))
-        self.ax = self.canvas.figure.subplots()
-        right_layout.addWidget(self.canvas)
+        plot_header_layout = QHBoxLayout()
+        plot_header_layout.addWidget(QLabel("<b>Gráfico de Arrhenius (ln(k) vs 1/T)</b>"))
+        plot_header_layout.addStretch()
+        self.plot = FastPlot()
+        plot_header_layout.addWidget(export_button(self.plot))
+        right_layout.addLayout(plot_header_layout)
+        right_layout.addWidget(self.plot)
         
         self.ea_label = QLabel("Energia de Ativação (Ea): N/A")
         self.a_label = QLabel("Fator Pré-exponencial (A): N/A")
@@ -129,7 +123,7 @@ class KineticAnalysisTab(QWidget):
         self._update_plot_style()
 
     def _add_experiment(self):
-        filepath, _ = QFileDialog.getOpenFileName(self, "Selecionar species.log", "", "Log Files (*.log);;All files (*.*)")
+        filepath, _ = QFileDialog.getOpenFileName(self, "Selecionar species.log ou bonds do ReaxFF", "", "Log Files (*.log);;ReaxFF bonds (*.reaxff *.reaxc *.gz *.zst);;All files (*.*)")
         if not filepath: return
         
         temp, ok = QInputDialog.getDouble(self, "Temperatura", "Digite a temperatura (K) para este experimento:", 298.15, 0, 10000, 2)
@@ -141,7 +135,8 @@ class KineticAnalysisTab(QWidget):
         self.exp_table.setItem(row, 0, QTableWidgetItem(os.path.basename(filepath)))
         self.exp_table.setItem(row, 1, QTableWidgetItem(f"{temp:.2f}"))
         
-        self.experiments[item_id] = {'path': filepath, 'temp': temp, 'log_data': None}
+        bonds = ReaxFFBonds(filepath) if is_reaxff_bonds_file(filepath) else None
+        self.experiments[item_id] = {'path': filepath, 'temp': temp, 'log_data': None, 'bonds': bonds}
         self._update_reagent_list()
 
     def _remove_experiment(self):
@@ -156,15 +151,29 @@ class KineticAnalysisTab(QWidget):
         
         self._update_reagent_list()
 
+    def _update_bonds_experiments(self):
+        # As ordens de ligação ficam em memória; só as espécies são recalculadas com o novo corte
+        for exp in self.experiments.values():
+            if exp.get('bonds') is not None:
+                exp['log_data'] = None
+        self._update_reagent_list()
+
     def _update_reagent_list(self):
         all_species = set()
         for exp in self.experiments.values():
-            if exp['log_data'] is None:
-                status, log_data = _preprocess_log_file(exp['path'])
+            if exp['log_data'] is None and exp.get('bonds') is not None:
+                try:
+                    table = exp['bonds'].species_table(self.bond_types_entry.text().split(), self.bond_cutoff_spin.value())
+                    exp['log_data'] = SpeciesTable.from_dict(table)
+                except Exception as e:
+                    QMessageBox.warning(self, "Aviso", f"Falha ao ler {os.path.basename(exp['path'])}: {e}")
+                    exp['bonds'] = None
+            elif exp['log_data'] is None:
+                status, log_data = load_species_log(exp['path'])
                 if status == 'success':
                     exp['log_data'] = log_data
             if exp['log_data']:
-                all_species.update(key for data in exp['log_data'].values() for key in data.keys())
+                all_species.update(exp['log_data'].species)
         
         self.reagent_combo.clear()
         if all_species:
@@ -189,13 +198,12 @@ class KineticAnalysisTab(QWidget):
             log_data = exp_data['log_data']
             if not log_data: continue
             
-            timesteps = sorted(log_data.keys())
-            concentrations = [log_data[ts].get(reagent, 0) for ts in timesteps]
-            valid_indices = [i for i, c in enumerate(concentrations) if c > 0]
-            if len(valid_indices) < 3: continue
+            concentrations = log_data.column(reagent)
+            valid = concentrations > 0
+            if np.count_nonzero(valid) < 3: continue
             
-            t = np.array([timesteps[i] for i in valid_indices])
-            conc = np.array([concentrations[i] for i in valid_indices])
+            t = log_data.timesteps[valid].astype(np.float64)
+            conc = concentrations[valid].astype(np.float64)
             
             res0 = linregress(t, conc); k0, r2_0 = -res0.slope, res0.rvalue**2
             res1 = linregress(t, np.log(conc)); k1, r2_1 = -res1.slope, res1.rvalue**2
@@ -247,23 +255,10 @@ class KineticAnalysisTab(QWidget):
         
         self._update_plot_style()
         fit_line = intercept + slope * inv_T
-        self.ax.scatter(inv_T, ln_k, color='#e0218a', label=f'Dados (k de ordem {selected_order})', s=50, zorder=5)
-        self.ax.plot(inv_T, fit_line, color='#3498DB', linestyle='--', label=f'Ajuste Linear (R² = {r_value**2:.4f})')
-        legend = self.ax.legend()
-        legend.get_frame().set_facecolor("#2c2e3a")
-        for text in legend.get_texts(): text.set_color("white")
-        self.canvas.draw()
+        order = np.argsort(inv_T) # Reta desenhada da esquerda para a direita
+        self.plot.set_curve('fit', inv_T[order], fit_line[order], name=f'Ajuste Linear (R² = {r_value**2:.4f})', pen=dashed_pen('#3498DB', 2))
+        self.plot.set_curve('data', inv_T, ln_k, name=f'Dados (k de ordem {selected_order})', symbol='o', symbol_size=10, symbol_brush='#e0218a')
     
     def _update_plot_style(self):
-        self.ax.clear()
-        self.ax.set_facecolor("#2c2e3a")
-        for spine in self.ax.spines.values(): spine.set_color("#555")
-        self.ax.tick_params(axis='x', colors="#e0e0e0")
-        self.ax.tick_params(axis='y', colors="#e0e0e0")
-        
-        self.ax.set_xlabel('1/T (K⁻¹)', color="#b0b0b0")
-        self.ax.set_ylabel('ln(k)', color="#b0b0b0")
-        self.ax.set_title('Gráfico de Arrhenius', color="#e0e0e0", weight='bold')
-        self.ax.grid(True, linestyle='--', alpha=0.2, color="#777")
-        self.canvas.figure.tight_layout()
-        self.canvas.draw()
\ No newline at end of file
+        self.plot.remove_curves()
+        self.plot.set_labels('Gráfico de Arrhenius', '1/T (K⁻¹)', 'ln(k)')
\ No newline at end of file
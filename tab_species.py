@@ -1,24 +1,86 @@
 # tab_species.py
 import os
+import re
 from itertools import cycle
 import numpy as np
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QListWidget, 
                              QSlider, QLineEdit, QFileDialog, QMessageBox, QFrame,
-                             QLabel, QCheckBox, QTableWidget, QTableWidgetItem, QHeaderView,
-                             QSplitter)
-from PyQt6.QtCore import Qt
+                             QLabel, QCheckBox, QTableWidget, QTableWidgetItem, QHeaderView, QTableView,
+                             QSplitter, QApplication, QDoubleSpinBox, QDialog)
+from PyQt6.QtCore import Qt, QTimer, QAbstractTableModel, QModelIndex
 
-import matplotlib
-matplotlib.use('Qt5Agg')
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
+import pyqtgraph as pg
+
+from species_engine import species_from_trajectory
+from species_log import SpeciesTable, SpeciesLogFollower, load_species_log
+from reaxff_bonds import ReaxFFBonds, DEFAULT_BOND_ORDER_CUTOFF
+from reaction_tracker import track_trajectory, track_bonds, reaction_equation
+from plot_widgets import FastPlot, dashed_pen, export_button
+
+FOLLOW_INTERVAL_MS = 2000 # Intervalo de leitura/redesenho no modo de acompanhamento
+SLIDER_DEBOUNCE_MS = 30 # Atualização da tabela/marcador só depois que o slider para por este tempo
+# Nome do arquivo de saída do fix reaxff/species em um script de input
+SPECIES_FIX_PATTERN = re.compile(r"^\s*fix\s+\S+\s+\S+\s+reaxff/species\s+\S+\s+\S+\s+\S+\s+(\S+)", re.MULTILINE)
+
+class SpeciesCompositionModel(QAbstractTableModel):
+    """Composição de um timestep lida direto do ranking da SpeciesTable, sem um item Qt por célula.
+
+    Com as contagens em ordem decrescente, as espécies que passam no filtro
+    'contagem > N' formam um prefixo da linha, achado por busca binária; o total
+    filtrado sai da soma acumulada. Só as linhas visíveis são formatadas pela view.
+    """
+    HEADERS = ('Molécula', 'Contagem', '%')
+    TOTAL_LABEL = "TOTAL (Filtrado)"
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.table = None; self.start = self.end = 0; self.total = 0
+
+    def set_timestep(self, table, index, min_count=0):
+        self.beginResetModel()
+        self.table = table; self.start = self.end = 0; self.total = 0
+        if table is not None and len(table):
+            indptr, _, values, cumulative = table.ranking()
+            start, end = int(indptr[index]), int(indptr[index + 1])
+            end = start + int(np.searchsorted(-values[start:end], -min_count, side='left')) # Contagens > min_count
+            self.start, self.end, self.total = start, end, int(cumulative[end] - cumulative[start])
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid(): return 0
+        num_species = self.end - self.start
+        return num_species + 1 if num_species else 0 # Linha de total no fim
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid(): return None
+        row, column = index.row(), index.column()
+        if row == self.end - self.start: return (self.TOTAL_LABEL, str(self.total), "100.00%")[column]
+        _, columns, values, _ = self.table.ranking()
+        k = self.start + row; count = int(values[k])
+        if column == 0: return self.table.species[columns[k]]
+        if column == 1: return str(count)
+        return f"{count / self.total * 100:.2f}%"
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal: return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
 
 class SpeciesAnalysisTab(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.log_data = {}
-        self.available_timesteps = []
-        self.slider_marker = None
+        self.log_data = None # SpeciesTable (timesteps x espécies)
+        self.available_timesteps = np.zeros(0, dtype=np.int64)
+        self.species_colors = {} # Cor fixa por espécie enquanto ela estiver no gráfico
+        self.reaxff_bonds = None # Ordens de ligação do fix reaxff/bonds, para recalcular com outro corte
+        self.trajectory_path = None # Trajetória de onde vieram as espécies (para o rastreamento de reações)
+        self.follower = None # SpeciesLogFollower do species.log em acompanhamento
+        self.follow_timer = QTimer(self); self.follow_timer.setInterval(FOLLOW_INTERVAL_MS)
+        self.follow_timer.timeout.connect(self._poll_follow)
+        self.slider_timer = QTimer(self); self.slider_timer.setSingleShot(True); self.slider_timer.setInterval(SLIDER_DEBOUNCE_MS)
+        self.slider_timer.timeout.connect(self._update_table_from_slider)
         
         self.PLOT_COLORS = cycle(["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd", "#8c564b"])
         
@@ -41,10 +103,42 @@ class SpeciesAnalysisTab(QWidget):
         btn_load = QPushButton("Carregar o log de espécies...")
         btn_load.clicked.connect(self._load_file)
         load_layout.addWidget(btn_load)
+        btn_from_trajectory = QPushButton("Identificar da trajetória...")
+        btn_from_trajectory.setToolTip("Identifica as espécies por conectividade (raios covalentes) em cada frame de um dump.lammpstrj,\nusando todos os núcleos.")
+        btn_from_trajectory.clicked.connect(self._load_from_trajectory)
+        load_layout.addWidget(btn_from_trajectory)
+        self.follow_check = QCheckBox("Acompanhar")
+        self.follow_check.setToolTip("Acompanha um species.log ainda em escrita (simulação em andamento),\nlendo só o que foi acrescentado a cada poucos segundos.")
+        self.follow_check.toggled.connect(self._toggle_follow)
+        load_layout.addWidget(self.follow_check)
+        self.live_check = QCheckBox("Ao vivo")
+        self.live_check.setToolTip("Ao iniciar uma simulação em Controle da Simulação, passa a acompanhar o species.log dela,\nmesmo que outros dados estejam carregados (sem esta opção, só quando nada foi carregado).")
+        load_layout.addWidget(self.live_check)
         self.label_arquivo = QLabel("Nenhum arquivo carregado.")
         load_layout.addWidget(self.label_arquivo)
         load_layout.addStretch()
         left_layout.addLayout(load_layout)
+
+        # Arquivo de ligações do ReaxFF: espécies recalculadas para qualquer corte de ordem de ligação
+        bonds_layout = QHBoxLayout()
+        btn_load_bonds = QPushButton("Carregar bonds ReaxFF...")
+        btn_load_bonds.setToolTip("Lê a saída do fix reaxff/bonds e identifica as espécies pelo corte de ordem de ligação.")
+        btn_load_bonds.clicked.connect(self._load_bonds_file)
+        bonds_layout.addWidget(btn_load_bonds)
+        bonds_layout.addWidget(QLabel("Corte BO:"))
+        self.bond_cutoff_spin = QDoubleSpinBox(); self.bond_cutoff_spin.setRange(0.01, 3.0); self.bond_cutoff_spin.setSingleStep(0.05)
+        self.bond_cutoff_spin.setDecimals(2); self.bond_cutoff_spin.setValue(DEFAULT_BOND_ORDER_CUTOFF)
+        self.bond_cutoff_spin.editingFinished.connect(self._update_bonds_species)
+        bonds_layout.addWidget(self.bond_cutoff_spin)
+        bonds_layout.addWidget(QLabel("Elementos por tipo:"))
+        self.bond_types_entry = QLineEdit("H O C"); self.bond_types_entry.setToolTip("Elemento de cada tipo LAMMPS, na ordem (tipo 1, tipo 2, ...).")
+        self.bond_types_entry.editingFinished.connect(self._update_bonds_species)
+        bonds_layout.addWidget(self.bond_types_entry)
+        btn_reactions = QPushButton("Rastrear reações...")
+        btn_reactions.setToolTip("Compara as moléculas de frames consecutivos pelos átomos em comum e lista as reações\n(trajetória ou bonds ReaxFF carregados).")
+        btn_reactions.clicked.connect(self._track_reactions)
+        bonds_layout.addWidget(btn_reactions)
+        left_layout.addLayout(bonds_layout)
         
         # Separador visual
         separator = QFrame()
@@ -56,7 +150,7 @@ class SpeciesAnalysisTab(QWidget):
         slider_layout = QHBoxLayout()
         slider_layout.addWidget(QLabel("Timestep:"))
         self.slider = QSlider(Qt.Orientation.Horizontal)
-        self.slider.valueChanged.connect(self._update_table_from_slider)
+        self.slider.valueChanged.connect(self._on_slider_moved)
         slider_layout.addWidget(self.slider)
         self.label_timestep = QLabel("N/A")
         slider_layout.addWidget(self.label_timestep)
@@ -75,17 +169,18 @@ class SpeciesAnalysisTab(QWidget):
         left_layout.addLayout(filter_layout)
         
         left_layout.addWidget(QLabel("<b>Composição no Timestep:</b>"))
-        self.tree = QTableWidget(); self.tree.setColumnCount(3); self.tree.setHorizontalHeaderLabels(['Molécula', 'Contagem', '%'])
+        self.composition_model = SpeciesCompositionModel(self)
+        self.tree = QTableView(); self.tree.setModel(self.composition_model); self.tree.verticalHeader().setVisible(False)
         self.tree.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        self.tree.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers); left_layout.addWidget(self.tree)
+        self.tree.setEditTriggers(QTableView.EditTrigger.NoEditTriggers); left_layout.addWidget(self.tree)
         
         # --- PAINEL DIREITO (GRÁFICO) ---
         right_panel = QFrame(); right_panel.setObjectName("Card"); right_layout = QVBoxLayout(right_panel)
         graph_controls_layout = QHBoxLayout(); graph_controls_layout.addStretch()
         self.marker_check = QCheckBox("Mostrar Marcador"); self.marker_check.setChecked(True); self.marker_check.stateChanged.connect(self._update_marker)
         graph_controls_layout.addWidget(self.marker_check)
-        self.canvas = FigureCanvas(Figure(figsize=(5, 4), facecolor="#2c2e3a")); self.ax = self.canvas.figure.subplots()
-        right_layout.addLayout(graph_controls_layout); right_layout.addWidget(self.canvas)
+        self.plot = FastPlot(); graph_controls_layout.addWidget(export_button(self.plot))
+        right_layout.addLayout(graph_controls_layout); right_layout.addWidget(self.plot)
         
         # Adiciona os painéis ao splitter
         splitter.addWidget(left_panel)
@@ -99,73 +194,156 @@ class SpeciesAnalysisTab(QWidget):
     def _load_file(self):
         filepath, _ = QFileDialog.getOpenFileName(self, "Selecionar Arquivo de Log de Espécies", "", "Log Files (*.log);;All Files (*.*)")
         if not filepath: return
-        status, result = self._preprocess_log_file(filepath)
+        status, result = load_species_log(filepath)
         if status == 'error': QMessageBox.critical(self, "Erro", result); return
-        self.log_data = result; self.available_timesteps = sorted(self.log_data.keys())
-        self.label_arquivo.setText(f"Log: {os.path.basename(filepath)}")
-        self.slider.setRange(0, len(self.available_timesteps) - 1); self.slider.setValue(0)
-        self.listbox.clear()
-        all_species = set(key for data in self.log_data.values() for key in data.keys())
-        self.listbox.addItems(sorted(list(all_species)))
+        self._stop_follow()
+        self.reaxff_bonds = None; self.trajectory_path = None; self._set_species_data(result, f"Log: {os.path.basename(filepath)}")
+    def _load_from_trajectory(self):
+        filepath, _ = QFileDialog.getOpenFileName(self, "Selecionar arquivo de trajetória", "", "LAMMPS Trajectory (*.lammpstrj *.lammpstrj.gz *.lammpstrj.zst);;All files (*.*)")
+        if not filepath: return
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        # Reaproveita o cache binário, se houver; fórmulas na ordem dos tipos, como no species.log
+        try: result = species_from_trajectory(filepath, use_cache=True, element_order=self.bond_types_entry.text().split())
+        except Exception as e:
+            QApplication.restoreOverrideCursor(); QMessageBox.critical(self, "Erro", f"Falha ao identificar as espécies: {e}"); return
+        QApplication.restoreOverrideCursor()
+        if not result: QMessageBox.critical(self, "Erro", "Nenhum frame válido encontrado na trajetória."); return
+        self._stop_follow()
+        self.reaxff_bonds = None; self.trajectory_path = filepath; self._set_species_data(result, f"Trajetória: {os.path.basename(filepath)}")
+    def _load_bonds_file(self):
+        filepath, _ = QFileDialog.getOpenFileName(self, "Selecionar arquivo de ligações do ReaxFF", "", "ReaxFF bonds (*.reaxff *.reaxc *.gz *.zst);;All files (*.*)")
+        if not filepath: return
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        bonds = ReaxFFBonds(filepath)
+        try: bonds.load()
+        except Exception as e:
+            QApplication.restoreOverrideCursor(); QMessageBox.critical(self, "Erro", f"Falha ao ler o arquivo de ligações: {e}"); return
+        QApplication.restoreOverrideCursor()
+        if not bonds.frames: QMessageBox.critical(self, "Erro", "Nenhum frame encontrado no arquivo de ligações."); return
+        self._stop_follow(); self.reaxff_bonds = bonds; self.trajectory_path = None; self._update_bonds_species()
+    def _update_bonds_species(self):
+        if self.reaxff_bonds is None: return
+        type_names = self.bond_types_entry.text().split(); cutoff = self.bond_cutoff_spin.value()
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try: result = self.reaxff_bonds.species_table(type_names, cutoff)
+        finally: QApplication.restoreOverrideCursor()
+        self._set_species_data(result, f"Bonds: {os.path.basename(self.reaxff_bonds.filepath)} (BO ≥ {cutoff:.2f})")
+    def follow_simulation(self, working_directory, script_path):
+        # Chamado quando a aba de controle inicia o LAMMPS: acompanha o species.log do script, se houver
+        try:
+            with open(script_path, 'r') as f: match = SPECIES_FIX_PATTERN.search(f.read())
+        except OSError: return
+        if not match: return
+        # Não descarta uma análise em andamento sem o usuário ter pedido
+        if self.log_data is not None and self.follower is None and not self.live_check.isChecked(): return
+        self.follow_species_log(os.path.join(working_directory, match.group(1)))
+    def follow_species_log(self, filepath):
+        self._stop_follow()
+        self.follower = SpeciesLogFollower(filepath); self.reaxff_bonds = None; self.trajectory_path = None
+        self.log_data = None; self.available_timesteps = np.zeros(0, dtype=np.int64); self.listbox.clear(); self.composition_model.set_timestep(None, 0)
+        self.label_arquivo.setText(f"Acompanhando: {os.path.basename(filepath)} (aguardando dados...)")
+        self.follow_check.blockSignals(True); self.follow_check.setChecked(True); self.follow_check.blockSignals(False)
+        self.follow_timer.start(); self._poll_follow()
+    def _toggle_follow(self, checked):
+        if not checked: self._stop_follow(); return
+        filepath, _ = QFileDialog.getOpenFileName(self, "Selecionar species.log em escrita", "", "Log Files (*.log);;All Files (*.*)")
+        if filepath: self.follow_species_log(filepath)
+        else: self.follow_check.blockSignals(True); self.follow_check.setChecked(False); self.follow_check.blockSignals(False)
+    def _stop_follow(self):
+        self.follow_timer.stop(); self.follower = None
+        self.follow_check.blockSignals(True); self.follow_check.setChecked(False); self.follow_check.blockSignals(False)
+    def _poll_follow(self):
+        if self.follower is None: return
+        try: num_new = self.follower.poll()
+        except OSError: return
+        if not num_new: return
+        table = self.follower.table()
+        at_end = self.log_data is None or self.slider.value() == self.slider.maximum() # Segue o último timestep, a menos que o usuário tenha voltado
+        known = self.listbox.count()
+        if len(table.species) < known: self.listbox.clear(); known = 0 # Arquivo recriado
+        self.log_data = table; self.available_timesteps = table.timesteps
+        if len(table.species) > known: self.listbox.addItems(table.species[known:]); self.listbox.sortItems()
+        self.slider.blockSignals(True); self.slider.setRange(0, len(table) - 1)
+        if at_end: self.slider.setValue(len(table) - 1)
+        self.slider.blockSignals(False)
+        self.label_arquivo.setText(f"Acompanhando: {os.path.basename(self.follower.log_file)} ({len(table)} timesteps)")
         self._update_table_from_slider(); self._update_graph()
-    def _preprocess_log_file(self, log_file):
-        if not os.path.exists(log_file): return ('error', f"Arquivo não encontrado: {log_file}")
-        all_data = {}; i = 0
+    def _track_reactions(self):
+        if self.reaxff_bonds is None and self.trajectory_path is None:
+            QMessageBox.information(self, "Aviso", "Carregue uma trajetória ou um arquivo de bonds ReaxFF para rastrear as reações."); return
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
         try:
-            with open(log_file, 'r') as f: lines = f.readlines()
-        except Exception as e: return ('error', f"Não foi possível ler o arquivo: {e}")
-        while i < len(lines):
-            line = lines[i].strip()
-            if line.startswith('#'):
-                if i + 1 < len(lines):
-                    data_line = lines[i+1].strip(); data_parts = data_line.split()
-                    if data_parts and data_parts[0].isdigit():
-                        current_timestep = int(data_parts[0]); header_parts = line.lstrip('# ').split()
-                        species_names = header_parts[3:]; species_counts = [int(count) for count in data_parts[3:]]
-                        all_data[current_timestep] = dict(zip(species_names, species_counts))
-                i += 2
-            else: i += 1
-        if not all_data: return ('error', "Nenhum dado de espécies válido encontrado no arquivo.")
-        return ('success', all_data)
+            if self.reaxff_bonds is not None: tracker = track_bonds(self.reaxff_bonds, self.bond_types_entry.text().split(), self.bond_cutoff_spin.value())
+            else: tracker = track_trajectory(self.trajectory_path, use_cache=True, element_order=self.bond_types_entry.text().split())
+        except Exception as e:
+            QApplication.restoreOverrideCursor(); QMessageBox.critical(self, "Erro", f"Falha ao rastrear as reações: {e}"); return
+        QApplication.restoreOverrideCursor()
+        if not tracker.events: QMessageBox.information(self, "Reações", "Nenhuma reação detectada entre os frames."); return
+        self._show_reactions(tracker)
+    def _show_reactions(self, tracker):
+        first_seen = {}
+        for event in tracker.events: first_seen.setdefault((event.reactants, event.products), event.timestep)
+        reactions = sorted(tracker.reactions.items(), key=lambda item: (-item[1], first_seen[item[0]]))
+        dialog = QDialog(self); dialog.setWindowTitle(f"Reações ({len(tracker.events)} eventos em {tracker.frames_seen} frames)"); dialog.resize(700, 500)
+        layout = QVBoxLayout(dialog)
+        table = QTableWidget(len(reactions), 3); table.setHorizontalHeaderLabels(['Reação', 'Ocorrências', 'Primeiro timestep'])
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch); table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        for row, (key, count) in enumerate(reactions):
+            table.setItem(row, 0, QTableWidgetItem(reaction_equation(*key)))
+            table.setItem(row, 1, QTableWidgetItem(str(count))); table.setItem(row, 2, QTableWidgetItem(str(first_seen[key])))
+        layout.addWidget(table)
+        buttons_layout = QHBoxLayout()
+        btn_events = QPushButton("Exportar eventos..."); btn_events.clicked.connect(lambda: self._export_reactions(tracker.write_events, "Salvar eventos de reação", "reactions.tsv"))
+        btn_network = QPushButton("Exportar rede..."); btn_network.clicked.connect(lambda: self._export_reactions(tracker.write_network, "Salvar rede de reações", "reaction_network.tsv"))
+        buttons_layout.addWidget(btn_events); buttons_layout.addWidget(btn_network); buttons_layout.addStretch()
+        layout.addLayout(buttons_layout)
+        dialog.exec()
+    def _export_reactions(self, writer, title, default_name):
+        filepath, _ = QFileDialog.getSaveFileName(self, title, default_name, "Texto separado por tabulações (*.tsv);;All files (*.*)")
+        if not filepath: return
+        try: writer(filepath)
+        except Exception as e: QMessageBox.critical(self, "Erro", f"Não foi possível salvar o arquivo: {e}")
+    def _set_species_data(self, data, label):
+        # Aceita a tabela do species.log ou o dicionário timestep -> {fórmula: contagem} (trajetória, bonds)
+        self.log_data = data if isinstance(data, SpeciesTable) else SpeciesTable.from_dict(data)
+        self.available_timesteps = self.log_data.timesteps
+        self.label_arquivo.setText(label)
+        self.slider.setRange(0, len(self.available_timesteps) - 1); self.slider.setValue(0)
+        self.listbox.clear(); self.listbox.addItems(self.log_data.species)
+        self._update_table_from_slider(); self._update_graph()
     def _apply_filter(self): self._update_table_from_slider()
+    def _on_slider_moved(self, slider_index):
+        # O rótulo acompanha o slider na hora; tabela e marcador só quando o movimento pausa
+        if len(self.available_timesteps): self.label_timestep.setText(str(self.available_timesteps[slider_index]))
+        self.slider_timer.start()
     def _update_table_from_slider(self):
         slider_index = self.slider.value()
-        if not self.available_timesteps: return
-        timestep = self.available_timesteps[slider_index]; self.label_timestep.setText(str(timestep)); data = self.log_data.get(timestep, {})
+        if not len(self.available_timesteps): return
+        self.label_timestep.setText(str(self.available_timesteps[slider_index]))
         try: filter_value = int(self.filter_entry.text())
         except ValueError: filter_value = 0
-        filtered_data = {formula: count for formula, count in data.items() if count > filter_value}
-        self.tree.setRowCount(0); total = sum(filtered_data.values())
-        sorted_data = sorted(filtered_data.items(), key=lambda item: item[1], reverse=True)
-        for row, (formula, count) in enumerate(sorted_data):
-            self.tree.insertRow(row); percent = (count / total * 100) if total > 0 else 0
-            self.tree.setItem(row, 0, QTableWidgetItem(formula)); self.tree.setItem(row, 1, QTableWidgetItem(str(count))); self.tree.setItem(row, 2, QTableWidgetItem(f"{percent:.2f}%"))
-        if total > 0:
-            row_count = self.tree.rowCount(); self.tree.insertRow(row_count)
-            self.tree.setItem(row_count, 0, QTableWidgetItem("TOTAL (Filtrado)")); self.tree.setItem(row_count, 1, QTableWidgetItem(str(total))); self.tree.setItem(row_count, 2, QTableWidgetItem("100.00%"))
+        self.composition_model.set_timestep(self.log_data, slider_index, filter_value)
         self._update_marker()
     def _update_graph(self):
         if not self.log_data: return
         selected_items = self.listbox.selectedItems()
         if not selected_items: self._plot_graph_data({}, "Selecione uma ou mais espécies na lista"); return
-        data_to_plot = {}
-        for item in selected_items:
-            species = item.text(); y_vals = [self.log_data[ts].get(species, 0) for ts in self.available_timesteps]
-            data_to_plot[species] = y_vals
+        data_to_plot = {item.text(): self.log_data.column(item.text()) for item in selected_items}
         self._plot_graph_data(data_to_plot, "Evolução das Espécies")
     def _plot_graph_data(self, data_dict, title):
-        self.ax.clear(); self.slider_marker = None; self.ax.set_facecolor("#2c2e3a")
-        for spine in self.ax.spines.values(): spine.set_color("#555")
-        self.ax.tick_params(axis='x', colors="#e0e0e0"); self.ax.tick_params(axis='y', colors="#e0e0e0")
-        if data_dict:
-            for label, y_data in data_dict.items(): self.ax.plot(self.available_timesteps, y_data, marker='.', linestyle='-', markersize=4, label=label, color=next(self.PLOT_COLORS))
-            legend = self.ax.legend(); legend.get_frame().set_facecolor("#2c2e3a"); legend.get_frame().set_edgecolor("#555")
-            for text in legend.get_texts(): text.set_color("white")
-        self.ax.set_title(title, color="#e0e0e0", weight='bold'); self.ax.set_xlabel("Passo de Tempo (Timestep)", color="#b0b0b0"); self.ax.set_ylabel("Número de Moléculas", color="#b0b0b0")
-        self.ax.grid(True, linestyle='--', alpha=0.2, color="#777"); self.canvas.figure.tight_layout(); self._update_marker(); self.canvas.draw_idle()
+        # Curvas já existentes só recebem os dados novos (setData); as desmarcadas saem do gráfico
+        if not data_dict: self.plot.show_placeholder(title); self.plot.set_labels("", "", ""); self._update_marker(); return
+        self.plot.remove_curves(keep=data_dict)
+        for label in list(self.species_colors):
+            if label not in data_dict: del self.species_colors[label]
+        x = self.available_timesteps.astype(np.float64)
+        for label, y_data in data_dict.items():
+            if label not in self.species_colors: self.species_colors[label] = next(self.PLOT_COLORS)
+            color = self.species_colors[label]
+            self.plot.set_curve(label, x, y_data, name=label, pen=pg.mkPen(color, width=1.5), symbol='o', symbol_size=4, symbol_brush=color)
+        self.plot.set_labels(title, "Passo de Tempo (Timestep)", "Número de Moléculas"); self._update_marker()
     def _update_marker(self):
-        if self.slider_marker: self.slider_marker.remove(); self.slider_marker = None
-        if self.marker_check.isChecked() and self.available_timesteps:
-            slider_index = self.slider.value(); current_timestep = self.available_timesteps[slider_index]
-            self.slider_marker = self.ax.axvline(x=current_timestep, color="#e0218a", linestyle='--', linewidth=1.5, alpha=0.8)
-        self.canvas.draw_idle()
\ No newline at end of file
+        positions = []
+        if self.marker_check.isChecked() and len(self.available_timesteps) and self.plot.curves:
+            positions = [float(self.available_timesteps[self.slider.value()])]
+        self.plot.set_lines('marker', positions, pen=dashed_pen("#e0218a"))
\ No newline at end of file
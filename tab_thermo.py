@@ -1,17 +1,52 @@
 # tab_thermo.py
+from collections import OrderedDict
+import numpy as np
 import pandas as pd
 import yaml
 from scipy.ndimage import gaussian_filter1d
 import pyqtgraph as pg
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QComboBox, 
-                             QLabel, QSlider, QFileDialog, QMessageBox, QFrame)
-from PyQt6.QtCore import Qt
+                             QLabel, QSlider, QFileDialog, QMessageBox, QFrame, QCheckBox)
+from PyQt6.QtCore import Qt, QTimer
+
+from plot_widgets import FastPlot
+from thermo_parser import ThermoTable, load_thermo_log
+
+LIVE_REFRESH_MS = 500 # Intervalo mínimo entre redesenhos com a simulação em andamento
+SLIDER_DEBOUNCE_MS = 30
+SERIES_CACHE_BYTES = 512 * 2**20 # Memória das séries convertidas/suavizadas guardadas (LRU)
+PREVIEW_POINTS = 200_000 # Resolução da prévia suavizada enquanto o slider de sigma é arrastado
+
+
+def _extend_smoothing(smoothed, values, sigma):
+    """gaussian_filter1d de `values` reaproveitando `smoothed` (o mesmo filtro sobre um prefixo de `values`).
+
+    Com o truncamento padrão (4 sigma), só os pontos a menos de um raio do fim antigo
+    mudam quando chegam linhas novas; eles são recalculados a partir de uma janela local.
+    """
+    radius = int(4.0 * sigma + 0.5)
+    keep = max(0, len(smoothed) - radius)
+    start = max(0, keep - radius)
+    tail = gaussian_filter1d(values[start:], sigma=sigma)
+    return np.concatenate((smoothed[:keep], tail[keep - start:]))
+
+
+def _block_means(values, stride):
+    """Média de cada bloco de `stride` pontos consecutivos (o último bloco pode ser menor)."""
+    starts = np.arange(0, len(values), stride)
+    return np.add.reduceat(values, starts) / np.diff(np.append(starts, len(values)))
+
 
 class ThermoAnalysisTab(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.PLOT_COLORS = {"Temp": "#E74C3C", "Press": "#2ECC71", "Volume": "#F39C12", "Density": "#9B59B6", "PotEng": "#E67E22", "KinEng": "#F1C40F", "TotEng": "#3498DB", "Enthalpy": "#1ABC9C"}
         self.thermo_df = None
+        self.run_starts = np.zeros(0, dtype=np.int64) # Linha inicial de cada run do log
+        self.live_buffer = None # ThermoBuffer da simulação em andamento
+        self._shown_buffer = None # ThermoBuffer cujos dados estão em thermo_df (None para um arquivo aberto)
+        self._series_cache = OrderedDict() # (propriedade, unidade, sigma, passo) -> série; sigma None = só convertida
+        self._original_series = None # Série na curva 'Original' (evita setData quando só o sigma muda)
         self.current_theme = 'dark' # Armazena o tema atual
 
         self.CONVERSION_FUNCTIONS = {
@@ -56,17 +91,31 @@ class ThermoAnalysisTab(QWidget):
         self.sigma_slider = QSlider(Qt.Orientation.Horizontal)
         self.sigma_slider.setRange(1, 100)
         self.sigma_slider.setValue(20)
-        self.sigma_slider.valueChanged.connect(self._update_plots)
+        self.sigma_slider.valueChanged.connect(self._on_sigma_moved)
+        self.sigma_slider.sliderReleased.connect(self._update_plots) # Volta à resolução completa ao soltar
         self.sigma_slider.setEnabled(False)
+        self.sigma_timer = QTimer(self)
+        self.sigma_timer.setSingleShot(True); self.sigma_timer.setInterval(SLIDER_DEBOUNCE_MS)
+        self.sigma_timer.timeout.connect(self._update_plots)
         top_layout.addWidget(self.sigma_slider)
         
         self.sigma_label = QLabel("20.0")
         top_layout.addWidget(self.sigma_label)
 
+        self.live_check = QCheckBox("Ao vivo")
+        self.live_check.setToolTip("Mostra o thermo da simulação iniciada em Controle da Simulação, à medida que o LAMMPS o imprime.")
+        self.live_check.setChecked(True)
+        top_layout.addWidget(self.live_check)
+        self.live_timer = QTimer(self)
+        self.live_timer.setSingleShot(True); self.live_timer.setInterval(LIVE_REFRESH_MS)
+        self.live_timer.timeout.connect(self._refresh_live)
+
         main_layout.addWidget(top_frame)
         
-        self.plot_widget = pg.PlotWidget()
-        self.plot_item = self.plot_widget.getPlotItem()
+        # Downsampling por picos e clip-to-view: só os pontos visíveis, na resolução da tela, são desenhados
+        self.plot_widget = FastPlot()
+        self.plot_item = self.plot_widget.plot_item
+        self.legend = self.plot_widget.legend
         main_layout.addWidget(self.plot_widget)
         
         self._update_plots()
@@ -74,22 +123,62 @@ class ThermoAnalysisTab(QWidget):
     def _load_and_plot(self):
         filepath, _ = QFileDialog.getOpenFileName(self, "Selecionar log.lammps", "", "LAMMPS Log (log.lammps);;All Files (*.*)")
         if not filepath: return
-        status, result = self._parse_log_to_dataframe(filepath)
+        status, result = self._load_thermo_table(filepath)
         if status == 'error':
             QMessageBox.critical(self, "Erro ao Processar Log", result)
             return
-        self.thermo_df = result
+        self.live_check.setChecked(False); self.live_timer.stop() # O arquivo aberto não é substituído pela simulação em andamento
+        self._shown_buffer = None
+        self._set_table(result)
+
+    def _set_table(self, table):
+        self._series_cache.clear()
+        self.thermo_df = table.to_dataframe()
+        self.run_starts = table.run_starts
         thermo_properties = [col for col in self.thermo_df.columns if col not in ['Step', 'Time']]
         
+        current = self.prop_combo.currentText()
+        self.prop_combo.blockSignals(True)
         self.prop_combo.clear()
         self.prop_combo.addItems(thermo_properties)
+        if current in thermo_properties: self.prop_combo.setCurrentText(current)
+        self.prop_combo.blockSignals(False)
         self.prop_combo.setEnabled(True)
         self.sigma_slider.setEnabled(True)
         
         self._on_property_change()
 
+    def update_live(self, buffer):
+        """Recebe o ThermoBuffer alimentado pelo stdout do LAMMPS; o gráfico é redesenhado no máximo a cada LIVE_REFRESH_MS."""
+        if not self.live_check.isChecked(): return
+        self.live_buffer = buffer
+        if not self.live_timer.isActive(): self.live_timer.start()
+
+    def _refresh_live(self):
+        if self.live_buffer is None or not self.live_check.isChecked(): return
+        table = self.live_buffer.table()
+        if not len(table): return
+        properties = [name for name in table.names if name not in ['Step', 'Time']]
+        if self.live_buffer is not self._shown_buffer or properties != [self.prop_combo.itemText(i) for i in range(self.prop_combo.count())]:
+            self._shown_buffer = self.live_buffer
+            self._set_table(table) # Nova simulação ou colunas novas: as séries guardadas não valem mais
+            return
+        # Mesma simulação: as séries guardadas são prefixos das novas e só recebem as linhas acrescentadas
+        self.thermo_df = table.to_dataframe()
+        self.run_starts = table.run_starts
+        self._update_plots()
+
+    def _load_thermo_table(self, log_file):
+        # Tokenizador dedicado (yaml ou colunas, com cache em disco); o YAML genérico fica só como alternativa
+        status, result = load_thermo_log(log_file)
+        if status == 'success': return (status, result)
+        status, df = self._parse_log_to_dataframe(log_file)
+        if status == 'error': return (status, df)
+        columns = [pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=float) for name in df.columns]
+        return ('success', ThermoTable(list(df.columns), columns, np.zeros(1, dtype=np.int64)))
+
     def _parse_log_to_dataframe(self, log_file):
-        # Lógica idêntica à anterior
+        # Caminho antigo via yaml.safe_load, usado quando o tokenizador não reconhece o log
         blocos_yaml = []; bloco_atual = []; dentro_do_bloco = False
         try:
             with open(log_file, "r") as f:
@@ -118,76 +207,103 @@ class ThermoAnalysisTab(QWidget):
         
         unit_type = self.PROPERTY_TO_UNIT_TYPE.get(prop_to_plot, None)
         
+        current_unit = self.unit_combo.currentText()
+        self.unit_combo.blockSignals(True)
         self.unit_combo.clear()
         if unit_type and unit_type in self.CONVERSION_FUNCTIONS:
             units = list(self.CONVERSION_FUNCTIONS[unit_type].keys())
             self.unit_combo.addItems(units)
+            if current_unit in units: self.unit_combo.setCurrentText(current_unit)
             self.unit_combo.setEnabled(True)
         else:
             self.unit_combo.setEnabled(False)
+        self.unit_combo.blockSignals(False)
             
         self._update_plots()
 
-    def _update_plots(self):
-        self.plot_item.clear()
-        self.legend = self.plot_item.addLegend(offset=(-10, 10))
-        # Aplica o estilo do tema atual à legenda recém-criada
-        self.update_theme(self.current_theme)
+    def _on_sigma_moved(self, sigma):
+        self.sigma_label.setText(f"{sigma:.1f}")
+        self.sigma_timer.start() # Reinicia a espera: só o último valor do arraste é desenhado
 
-        # Configuração do texto de placeholder
-        placeholder_color = '#A0A0A0' if self.current_theme == 'dark' else '#606060'
+    def _series(self, prop, unit, sigma=None, stride=1):
+        """Série da propriedade convertida para `unit` e, com `sigma`, suavizada; guardada em um cache LRU.
+
+        Com `stride` > 1 a série vira médias de blocos de `stride` pontos (prévia de menor
+        resolução para o arraste do slider, suavizada com sigma / stride). Se os dados
+        cresceram (simulação ao vivo), a série guardada é estendida em vez de recalculada.
+        """
+        key = (prop, unit, sigma, stride)
+        num_rows = len(self.thermo_df)
+        series = self._series_cache.get(key)
+        if series is not None and len(series) == -(-num_rows // stride):
+            self._series_cache.move_to_end(key)
+            return series
+        grown = stride == 1 and series is not None and len(series) < num_rows
+        if sigma is None and stride > 1:
+            series = _block_means(self._series(prop, unit), stride)
+        elif sigma is None:
+            unit_type = self.PROPERTY_TO_UNIT_TYPE.get(prop)
+            conversion_function = self.CONVERSION_FUNCTIONS.get(unit_type, {}).get(unit, lambda x: x)
+            values = self.thermo_df[prop].to_numpy(dtype=float)
+            series = np.concatenate((series, conversion_function(values[len(series):]))) if grown else conversion_function(values)
+        elif grown:
+            series = _extend_smoothing(series, self._series(prop, unit), sigma)
+        else:
+            series = gaussian_filter1d(self._series(prop, unit, None, stride), sigma=sigma / stride)
+        self._series_cache[key] = series
+        # Descarta as menos usadas recentemente até caber no limite (a recém-calculada sempre fica)
+        while len(self._series_cache) > 1 and sum(cached.nbytes for cached in self._series_cache.values()) > SERIES_CACHE_BYTES:
+            self._series_cache.popitem(last=False)
+        return series
+
+    def _show_placeholder(self, text):
+        self.plot_widget.show_placeholder(text)
+        self._original_series = None
+        self.plot_widget.set_labels("", "", "")
 
+    def _update_plots(self):
+        self.sigma_timer.stop()
         if self.thermo_df is None:
-            text_item = pg.TextItem('Carregue um arquivo log.lammps', color=placeholder_color, anchor=(0.5, 0.5))
-            self.plot_item.addItem(text_item)
-            self.plot_item.setTitle("")
-            self.plot_item.setLabel('bottom', "")
-            self.plot_item.setLabel('left', "")
+            self._show_placeholder('Carregue um arquivo log.lammps')
             return
             
         prop_to_plot = self.prop_combo.currentText()
         if not prop_to_plot: 
-            text_item = pg.TextItem('Selecione uma propriedade para visualizar', color=placeholder_color, anchor=(0.5, 0.5))
-            self.plot_item.addItem(text_item)
-            self.plot_item.setTitle("")
-            self.plot_item.setLabel('bottom', "")
-            self.plot_item.setLabel('left', "")
+            self._show_placeholder('Selecione uma propriedade para visualizar')
             return
         
         sigma = self.sigma_slider.value()
         self.sigma_label.setText(f"{sigma:.1f}")
-        
-        original_data = self.thermo_df[prop_to_plot]
         selected_unit = self.unit_combo.currentText()
-        unit_type = self.PROPERTY_TO_UNIT_TYPE.get(prop_to_plot)
-        
-        conversion_function = self.CONVERSION_FUNCTIONS.get(unit_type, {}).get(selected_unit, lambda x: x)
-        
-        converted_data = conversion_function(original_data)
-        suavizado = gaussian_filter1d(converted_data.to_numpy(dtype=float), sigma=sigma)
+        x_data = self._series("Step", None)
+
+        converted_data = self._series(prop_to_plot, selected_unit)
+        # Arraste do slider em logs longos: suavização sobre médias de blocos; a resolução completa vem ao soltar
+        stride = -(-len(x_data) // PREVIEW_POINTS) if self.sigma_slider.isSliderDown() else 1
+        smoothed_x, suavizado = self._series("Step", None, None, stride), self._series(prop_to_plot, selected_unit, sigma, stride)
         
         color_hex = self.PLOT_COLORS.get(prop_to_plot, '#FFFFFF')
-        x_data = self.thermo_df["Step"].to_numpy(dtype=float)
-        
         h = color_hex.lstrip('#')
         base_rgb = tuple(int(h[i:i+2], 16) for i in (0, 2, 4))
         
-        transparent_color = base_rgb + (80,)
-        pen_original = pg.mkPen(color=transparent_color, width=1.0)
-        self.plot_item.plot(x_data, converted_data.to_numpy(dtype=float), pen=pen_original, name='Original')
+        # Curvas atualizadas no lugar; a original só recebe dados quando a série muda (propriedade, unidade, linhas novas)
+        if converted_data is not self._original_series:
+            transparent_color = base_rgb + (80,)
+            self.plot_widget.set_curve('original', x_data, converted_data, name='Original', pen=pg.mkPen(color=transparent_color, width=1.0))
+            self._original_series = converted_data
+        self.plot_widget.set_curve('smoothed', smoothed_x, suavizado, name='Suavizada', pen=pg.mkPen(color=base_rgb, width=2.5))
 
-        pen_suavizada = pg.mkPen(color=base_rgb, width=2.5)
-        self.plot_item.plot(x_data, suavizado, pen=pen_suavizada, name='Suavizada')
+        # Fronteiras entre runs (minimize/run) do mesmo log
+        placeholder_color = '#A0A0A0' if self.current_theme == 'dark' else '#606060'
+        starts = [start for start in self.run_starts[1:] if 0 < start < len(x_data)]
+        self.plot_widget.set_lines('runs', x_data[starts], pen=pg.mkPen(color=placeholder_color, width=1, style=Qt.PenStyle.DashLine))
         
         y_label_text = f"{prop_to_plot}"
         if selected_unit:
             y_label_text += f" ({selected_unit})"
-        
-        self.plot_item.setTitle(f"{prop_to_plot} vs. Passo de Tempo")
-        self.plot_item.setLabel('bottom', "Passo de Tempo (Timestep)")
-        self.plot_item.setLabel('left', y_label_text)
-        self.plot_item.showGrid(x=True, y=True, alpha=0.2)
-    
+        self.plot_widget.set_labels(f"{prop_to_plot} vs. Passo de Tempo", "Passo de Tempo (Timestep)", y_label_text)
+        self.update_theme(self.current_theme) # Estilo do tema nas entradas da legenda
+
     def update_theme(self, theme):
         self.current_theme = theme # Armazena o tema
         if theme == 'dark':
@@ -197,8 +313,8 @@ class ThermoAnalysisTab(QWidget):
             text_color = '#1a1a1a'
             bg_color = pg.mkBrush(255, 255, 255, 200)
 
-        # A legenda é recriada em _update_plots, então estilizamos aqui
-        if hasattr(self, 'legend') and self.legend:
+        self.plot_widget.placeholder.setColor('#A0A0A0' if theme == 'dark' else '#606060')
+        if self.legend:
             self.legend.setBrush(bg_color)
             for _, label in self.legend.items:
                 label.setText(label.text, color=text_color)
\ No newline at end of file
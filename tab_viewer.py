@@ -4,11 +4,7 @@ from PyQt6.QtWidgets import QApplication
 import pyqtgraph.opengl as gl
 import numpy as np
 
-try:
-    import xyz2graph
-    XYZ2GRAPH_AVAILABLE = True
-except ImportError:
-    XYZ2GRAPH_AVAILABLE = False
+from bond_engine import COVALENT_RADII, element_codes, find_bonds
 
 ATOM_COLORS = {
     'C': (0.5, 0.5, 0.5, 1.0),   # Cinza
@@ -18,7 +14,7 @@ ATOM_COLORS = {
     'S': (1.0, 1.0, 0.0, 1.0),   # Amarelo
     'Xx': (1.0, 0.0, 1.0, 1.0)   # Rosa (default)
 }
-ATOM_RADII = {'C': 0.76, 'H': 0.31, 'O': 0.66, 'N': 0.71, 'S': 1.05, 'Xx': 0.7}
+ATOM_RADII = COVALENT_RADII # Mesma tabela usada na detecção de ligações
 
 def create_viewer_window(system_data, style):
     app = QApplication.instance()
@@ -39,18 +35,17 @@ def create_viewer_window(system_data, style):
     
     # Detecção de ligações
     bonds = []
-    if XYZ2GRAPH_AVAILABLE and style in ["Bolas e Varetas", "Varetas"]:
+    if style in ["Bolas e Varetas", "Varetas"]:
         try:
-            xyz_data = list(zip(symbols, coords.tolist()))
-            graph = xyz2graph.build_graph(xyz_data)
-            bonds = list(graph.edges)
+            element_names, codes = element_codes(symbols)
+            bonds = find_bonds(coords, codes, element_names)
         except Exception as e:
-            print(f"Aviso: xyz2graph falhou em detectar ligações: {e}")
+            print(f"Aviso: falha ao detectar ligações: {e}")
 
     # Renderiza a cena de acordo com o estilo
     if style == "Bolas e Varetas":
         # Desenha ligações como cilindros
-        if bonds:
+        if len(bonds):
             for start_idx, end_idx in bonds:
                 p1 = coords[start_idx]
                 p2 = coords[end_idx]
@@ -64,7 +59,7 @@ def create_viewer_window(system_data, style):
 
     elif style == "Varetas":
         # Desenha apenas as ligações
-        if bonds:
+        if len(bonds):
             for start_idx, end_idx in bonds:
                 p1 = coords[start_idx]
                 p2 = coords[end_idx]
@@ -0,0 +1,201 @@
+# thermo_parser.py
+import os
+import numpy as np
+import pandas as pd
+
+import parse_cache
+
+DATA_CHUNK_ROWS = 65536 # Linhas acumuladas antes de cada conversão em bloco para float64
+NUMBER_START = b'0123456789-+.'
+
+
+class ThermoTable:
+    """Saída do thermo em forma colunar: um array float64 por palavra-chave.
+
+    `names` segue a ordem de aparecimento das colunas, `columns[j]` é a série da
+    coluna j (NaN nas linhas de runs que não a imprimiam) e `run_starts` traz a
+    linha em que começa cada run (minimize/run) do log.
+    """
+
+    __slots__ = ('names', 'columns', 'run_starts')
+
+    def __init__(self, names, columns, run_starts):
+        self.names = names
+        self.columns = columns
+        self.run_starts = run_starts
+
+    def __len__(self):
+        return len(self.columns[0]) if self.columns else 0
+
+    def column(self, name):
+        return self.columns[self.names.index(name)]
+
+    def to_dataframe(self):
+        return pd.DataFrame(dict(zip(self.names, self.columns)), copy=False)
+
+
+class ThermoBuffer:
+    """Colunas do thermo que crescem por blocos de linhas (capacidade dobrada sob demanda).
+
+    Cada run declara suas colunas com `start_run`; colunas novas ganham espaço no fim
+    (com NaN nas linhas anteriores), então nada do que já foi guardado é copiado linha a linha.
+    """
+
+    def __init__(self):
+        self.names = []
+        self.num_rows = 0
+        self.run_starts = []
+        self._index = {}
+        self._run_columns = None
+        self._data = np.full((8, 1024), np.nan) # colunas x linhas: cada série fica contígua
+
+    def start_run(self, names):
+        for name in names:
+            if name not in self._index: self._index[name] = len(self.names); self.names.append(name)
+        self._run_columns = np.array([self._index[name] for name in names], dtype=np.intp)
+        self.run_starts.append(self.num_rows)
+
+    def end_run(self):
+        self._run_columns = None
+
+    @property
+    def run_width(self):
+        return 0 if self._run_columns is None else len(self._run_columns)
+
+    def append(self, values):
+        """Acrescenta as linhas `values` (linhas x colunas do run atual)."""
+        start, end = self.num_rows, self.num_rows + len(values)
+        column_capacity, row_capacity = self._data.shape
+        if end > row_capacity: row_capacity = max(end, 2 * row_capacity)
+        if len(self.names) > column_capacity: column_capacity = max(len(self.names), 2 * column_capacity)
+        if (column_capacity, row_capacity) != self._data.shape:
+            grown = np.full((column_capacity, row_capacity), np.nan)
+            grown[:self._data.shape[0], :self.num_rows] = self._data[:, :self.num_rows]; self._data = grown
+        self._data[self._run_columns, start:end] = values.T
+        self.num_rows = end
+
+    def last(self, name):
+        """Último valor da coluna `name` (NaN se ela não existe ou ainda não há linhas)."""
+        j = self._index.get(name)
+        return self._data[j, self.num_rows - 1] if j is not None and self.num_rows else np.nan
+
+    def table(self):
+        """ThermoTable com tudo o que já foi lido (visões dos arrays internos, sem cópia)."""
+        return ThermoTable(list(self.names), [self._data[j, :self.num_rows] for j in range(len(self.names))],
+                           np.array(self.run_starts, dtype=np.int64))
+
+
+class ThermoLogParser:
+    """Tokenizador da saída do thermo do LAMMPS, linha a linha.
+
+    Reconhece os dois formatos: 'thermo_modify line yaml' (blocos ---/... com
+    'keywords:' e linhas '- [...]') e o clássico em colunas (cabeçalho logo após
+    'Per MPI rank memory allocation', dados até 'Loop time of'). As linhas de dados
+    são só separadas e guardadas; a conversão para float64 é feita em blocos de até
+    DATA_CHUNK_ROWS linhas direto para o ThermoBuffer. Avisos intercalados e linhas
+    malformadas (ex.: truncadas) são descartados. `feed` aceita trechos arbitrários
+    da saída (ex.: stdout do LAMMPS em andamento), guardando a linha incompleta do fim.
+    """
+
+    def __init__(self, buffer=None):
+        self.buffer = buffer or ThermoBuffer()
+        self._style = None # None, 'yaml' ou 'columns'
+        self._expect_header = False
+        self._rows = []
+        self._remainder = b""
+
+    def feed(self, chunk):
+        """Processa um trecho da saída (bytes); devolve o número de linhas de dados novas no buffer."""
+        lines = (self._remainder + chunk).split(b'\n')
+        self._remainder = lines.pop() # Sem '\n' final: linha ainda sendo escrita
+        rows_before = self.buffer.num_rows
+        for line in lines: self.feed_line(line)
+        self.flush()
+        return self.buffer.num_rows - rows_before
+
+    def feed_line(self, line):
+        """Processa uma linha completa (bytes)."""
+        stripped = line.strip()
+        if self._style == 'yaml':
+            if stripped.startswith(b'- ['):
+                if self.buffer.run_width: self._add_row(stripped[3:].rstrip(b'], ').replace(b',', b' '))
+            elif stripped.startswith(b'keywords:'):
+                self.flush(); self.buffer.start_run(_yaml_keywords(stripped[9:]))
+            elif stripped == b'...':
+                self.flush(); self._style = None
+            return
+        if self._style == 'columns':
+            if stripped[:1] and stripped[:1] in NUMBER_START:
+                self._add_row(stripped)
+            elif stripped.startswith(b'Loop time of'):
+                self.flush(); self._style = None
+            return
+        if stripped == b'---':
+            self._style = 'yaml'; self._expect_header = False
+            self.buffer.end_run() # Só há dados depois de 'keywords:'
+        elif stripped.startswith(b'Per MPI rank memory allocation'):
+            self._expect_header = True
+        elif self._expect_header and stripped:
+            self._expect_header = False
+            names = stripped.split()
+            if not any(name[:1] in NUMBER_START for name in names):
+                self.buffer.start_run([name.decode('utf-8', errors='replace') for name in names]); self._style = 'columns'
+
+    def _add_row(self, row):
+        self._rows.append(row)
+        if len(self._rows) >= DATA_CHUNK_ROWS: self.flush()
+
+    def flush(self):
+        """Converte as linhas pendentes e as acrescenta ao buffer."""
+        if not self._rows: return
+        rows, self._rows = self._rows, []
+        width = self.buffer.run_width
+        try:
+            values = np.loadtxt(rows, dtype=np.float64, ndmin=2)
+            if values.shape[1] != width: raise ValueError
+        except ValueError:
+            values = _convert_rows(rows, width) # Há linhas fora do formato: converte uma a uma
+        if len(values): self.buffer.append(values)
+
+
+def _yaml_keywords(text):
+    """"['Step', 'Temp', ]" -> ['Step', 'Temp']"""
+    names = (name.strip().strip(b"'\"") for name in text.strip().strip(b'[]').split(b','))
+    return [name.decode('utf-8', errors='replace') for name in names if name]
+
+
+def _convert_rows(rows, width):
+    values = []
+    for row in rows:
+        parts = row.split()
+        if len(parts) != width: continue
+        try: values.append([float(part) for part in parts])
+        except ValueError: continue
+    return np.array(values, dtype=np.float64).reshape(-1, width)
+
+
+def parse_thermo_log(log_file):
+    """Lê a saída do thermo de um log.lammps (yaml ou colunas, vários runs) para uma ThermoTable."""
+    if not os.path.exists(log_file): return ('error', f"Arquivo não encontrado: {log_file}")
+    parser = ThermoLogParser()
+    try:
+        with open(log_file, 'rb') as f:
+            for line in f: parser.feed_line(line)
+        parser.flush()
+    except Exception as e: return ('error', f"Não foi possível ler o arquivo: {e}")
+    table = parser.buffer.table()
+    if not table.names or not len(table): return ('error', "Nenhum dado de thermo encontrado no log.")
+    return ('success', table)
+
+
+def load_thermo_log(log_file):
+    """parse_thermo_log com cache em disco: reaberturas do mesmo log (tamanho/mtime iguais) não reprocessam o texto."""
+    cached = parse_cache.load(log_file, 'thermo')
+    if cached is not None and 'run_starts' in cached:
+        names = cached['names'].tolist()
+        return ('success', ThermoTable(names, [cached[f'column_{j}'] for j in range(len(names))], cached['run_starts']))
+    status, table = parse_thermo_log(log_file)
+    if status == 'success':
+        arrays = {f'column_{j}': column for j, column in enumerate(table.columns)}
+        parse_cache.store(log_file, 'thermo', dict(arrays, names=np.array(table.names, dtype=str), run_starts=table.run_starts))
+    return (status, table)
@@ -0,0 +1,131 @@
+# trajectory_cache.py
+import os
+import json
+import numpy as np
+
+from dump_reader import DumpReader
+from frame import Frame
+
+CACHE_SUFFIX = ".cache"
+CACHE_VERSION = 3
+# Colunas opcionais do dump guardadas quando presentes: nome -> (dtype, formato por átomo)
+OPTIONAL_ARRAYS = {'images': (np.int32, (3,)), 'charges': (np.float32, ()), 'velocities': (np.float32, (3,))}
+
+
+class TrajectoryCache:
+    """Cache binário colunar de uma trajetória dump.lammpstrj.
+
+    Guarda as coordenadas em float32 com formato (frames, átomos, 3), além de caixa,
+    timestep, ids, códigos de elemento e, se o dump as tiver, flags de imagem, cargas e
+    velocidades por frame. Os arrays são abertos com
+    np.memmap, então os frames entregues são visões do arquivo, sem cópia. Oferece a
+    mesma interface de leitura do DumpReader (len, index, read_frame, iter_frames).
+    """
+
+    def __init__(self, cache_dir, meta):
+        self.cache_dir = cache_dir
+        self.element_names = list(meta['element_names'])
+        self.coords = np.load(os.path.join(cache_dir, 'coords.npy'), mmap_mode='r')
+        self.ids = np.load(os.path.join(cache_dir, 'ids.npy'), mmap_mode='r')
+        self.elements = np.load(os.path.join(cache_dir, 'elements.npy'), mmap_mode='r')
+        self.optional = {name: np.load(os.path.join(cache_dir, f'{name}.npy'), mmap_mode='r') for name in meta.get('optional', [])}
+        self.unwrapped = bool(meta.get('unwrapped', False))
+        self.index = {'timesteps': np.load(os.path.join(cache_dir, 'timesteps.npy')),
+                      'box_bounds': np.load(os.path.join(cache_dir, 'box_bounds.npy'))}
+        self.index['natoms'] = np.full(len(self.index['timesteps']), self.coords.shape[1], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.index['timesteps'])
+
+    def __iter__(self):
+        return self.iter_frames()
+
+    def iter_frames(self, indices=None):
+        for k in (range(len(self)) if indices is None else indices):
+            yield self.read_frame(k)
+
+    def read_frame(self, k):
+        # Visões dos arrays mapeados em memória, sem cópia
+        optional = {name: self.optional[name][k] for name in self.optional}
+        return Frame(int(self.index['timesteps'][k]), self.ids[k], self.elements[k], self.coords[k],
+                     self.index['box_bounds'][k], self.element_names, unwrapped=self.unwrapped, **optional)
+
+    def element_code(self, element):
+        """Código inteiro do elemento na tabela do cache."""
+        return self.element_names.index(element)
+
+    # --- Criação e validação ---
+    @staticmethod
+    def path_for(filepath):
+        return filepath + CACHE_SUFFIX
+
+    @staticmethod
+    def _source_signature(filepath):
+        stat = os.stat(filepath)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    @classmethod
+    def open(cls, filepath):
+        """Abre o cache de `filepath` se existir e o arquivo fonte não tiver mudado (tamanho/mtime)."""
+        cache_dir = cls.path_for(filepath)
+        try:
+            with open(os.path.join(cache_dir, 'meta.json'), 'r') as f: meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get('version') != CACHE_VERSION or meta.get('source') != cls._source_signature(filepath):
+            return None
+        return cls(cache_dir, meta)
+
+    @classmethod
+    def convert(cls, reader, workers=None):
+        """Converte a trajetória do `reader` (DumpReader) para o cache binário e o abre.
+
+        Com `workers`, o texto é lido em paralelo por faixas de bytes (ver DumpReader.iter_frames_parallel).
+        """
+        natoms = reader.index['natoms']
+        if len(natoms) == 0:
+            raise ValueError("Nenhum frame válido encontrado no arquivo dump.")
+        if np.any(natoms != natoms[0]):
+            raise ValueError("O cache binário exige número de átomos constante em todos os frames.")
+        num_frames, num_atoms = len(natoms), int(natoms[0])
+        first_frame = reader.read_frame(0)
+        optional_names = [name for name in OPTIONAL_ARRAYS if getattr(first_frame, name) is not None]
+
+        cache_dir = cls.path_for(reader.filepath)
+        os.makedirs(cache_dir, exist_ok=True)
+        meta_path = os.path.join(cache_dir, 'meta.json')
+        if os.path.exists(meta_path): os.remove(meta_path) # Invalida o cache antigo durante a escrita
+
+        open_memmap = np.lib.format.open_memmap
+        coords = open_memmap(os.path.join(cache_dir, 'coords.npy'), mode='w+', dtype=np.float32, shape=(num_frames, num_atoms, 3))
+        ids = open_memmap(os.path.join(cache_dir, 'ids.npy'), mode='w+', dtype=np.int32, shape=(num_frames, num_atoms))
+        elements = open_memmap(os.path.join(cache_dir, 'elements.npy'), mode='w+', dtype=np.uint8, shape=(num_frames, num_atoms))
+        optional = {name: open_memmap(os.path.join(cache_dir, f'{name}.npy'), mode='w+', dtype=OPTIONAL_ARRAYS[name][0],
+                                      shape=(num_frames, num_atoms) + OPTIONAL_ARRAYS[name][1]) for name in optional_names}
+        timesteps = np.zeros(num_frames, dtype=np.int64)
+        box_bounds = np.zeros((num_frames, 3, 2))
+
+        # Só os frames indexados: os anexados ao arquivo depois da indexação não são lidos
+        frames = reader.iter_frames_parallel(workers, num_frames) if workers else reader.iter_frames(range(num_frames))
+        for k, frame in enumerate(frames):
+            coords[k] = frame.coords; ids[k] = frame.ids; elements[k] = frame.elements
+            for name, array in optional.items(): array[k] = getattr(frame, name)
+            timesteps[k] = frame.timestep; box_bounds[k] = frame.box_bounds
+        coords.flush(); ids.flush(); elements.flush()
+        for array in optional.values(): array.flush()
+        del coords, ids, elements, optional
+        np.save(os.path.join(cache_dir, 'timesteps.npy'), timesteps)
+        np.save(os.path.join(cache_dir, 'box_bounds.npy'), box_bounds)
+
+        # O meta.json é escrito por último: sua presença marca o cache como completo
+        meta = {'version': CACHE_VERSION, 'source': cls._source_signature(reader.filepath),
+                'element_names': reader.element_names, 'num_frames': num_frames, 'num_atoms': num_atoms,
+                'optional': optional_names, 'unwrapped': bool(first_frame.unwrapped)}
+        with open(meta_path, 'w') as f: json.dump(meta, f)
+        return cls(cache_dir, meta)
+
+
+def open_trajectory(filepath, use_cache=False):
+    """Abre a trajetória pelo caminho: o cache binário, se pedido e válido, senão o DumpReader."""
+    cache = TrajectoryCache.open(filepath) if use_cache else None
+    return cache if cache is not None else DumpReader(filepath)